@@ -3,16 +3,22 @@ import streamlit as st
 import os
 import json
 import time
+import uuid
 import threading
 import base64
 import tempfile
 import bcrypt
 from pathlib import Path
 from database.init_db import DatabaseManager
+from database.job_queue import JobQueue
 from config.user_settings import UserSettings
 from core.pdf_processor import PDFProcessor
 from core.sheets_uploader import SheetsUploader
+from core.sheets_client import SHEETS_CLIENTS
+from core.upload_service import get_upload_service
 from utils.file_manager import FileManager
+from utils.metrics import METRICS
+from utils.profiler import profile_document
 from datetime import datetime
 import logging
 from streamlit import rerun
@@ -57,6 +63,8 @@ def init_session_state():
         st.session_state.processing_status = None
     if 'processing_results' not in st.session_state:
         st.session_state.processing_results = []
+    if 'processing_batch' not in st.session_state:
+        st.session_state.processing_batch = None
     if 'spreadsheet_id' not in st.session_state:
         st.session_state.spreadsheet_id = ""
     if 'spreadsheet_name' not in st.session_state:
@@ -112,32 +120,38 @@ def create_user(username, name, email, password):
         return True
     return False
 
-def process_pdf(pdf_path, user_id, username):
-    """Processa um único PDF"""
+def process_pdf(pdf_path, file_name, user_id, username=None):
+    """Processa um único PDF do spool de uploads (executado pelos workers do serviço de upload)"""
     try:
-        logger.info(f"Iniciando processamento do PDF: {pdf_path}")
-        processor = PDFProcessor(pdf_path)
-        extracted_data = processor.extract_all_fields()
+        logger.info(f"Iniciando processamento do PDF: {file_name}")
+        processor = PDFProcessor(pdf_path, filename=file_name)
+        # PROFILE_MODE=cprofile|sampler perfila cada documento enviado pela interface
+        with profile_document(processor.get_edital_number(), file_name):
+            extracted_data = processor.extract_all_fields()
         
-        # Configura as credenciais do Google e a planilha do usuário
-        user_settings = UserSettings(user_id, username)
+        # Configura as credenciais do Google e a planilha do usuário (o serviço vem do cache de clientes)
         uploader = SheetsUploader(user_id, username)
         
-        success = uploader.update_sheet(extracted_data)
+        with METRICS.span('envio', file_name):
+            success = uploader.update_sheet(extracted_data)
         
-        file_manager = FileManager()
         if success:
+            # O arquivo do spool é movido (não copiado) para a pasta de processados depois do envio
             edital_number = processor.get_edital_number()
-            file_manager.move_to_processed(pdf_path, edital_number)
-            return True, f"✅ Processado: {os.path.basename(pdf_path)}"
+            with METRICS.span('mover', file_name):
+                saved_path = FileManager().save_processed(pdf_path, file_name, edital_number)
+            if saved_path is None:
+                # Os dados já estão na planilha, mas o PDF não foi guardado em PDF_PROCESSED
+                return False, f"❌ Enviado para a planilha, mas não foi possível salvar o arquivo processado: {file_name}"
+            return True, f"✅ Processado: {file_name}"
         else:
-            return False, f"❌ Erro ao enviar para planilha: {os.path.basename(pdf_path)}"
+            return False, f"❌ Erro ao enviar para planilha: {file_name}"
     except Exception as e:
-        logger.error(f"Erro ao processar {pdf_path}: {str(e)}")
-        return False, f"❌ Erro ao processar {os.path.basename(pdf_path)}: {str(e)}"
+        logger.error(f"Erro ao processar {file_name}: {str(e)}")
+        return False, f"❌ Erro ao processar {file_name}: {str(e)}"
 
 def process_pdfs(uploaded_files):
-    """Processa múltiplos PDFs"""
+    """Envia os PDFs para o serviço em segundo plano; a página acompanha o andamento sem ficar bloqueada"""
     # Inicializa o estado da sessão
     init_session_state()
     
@@ -150,39 +164,46 @@ def process_pdfs(uploaded_files):
         st.warning("Nenhum arquivo PDF selecionado.")
         return
     
-    file_manager = FileManager()
-    results = []
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+    upload_service = get_upload_service(process_pdf)
+    batch_id = uuid.uuid4().hex
     
-    # Use um spinner para indicar que o processamento está em andamento
-    with st.spinner("Processando PDFs..."):
-        for i, uploaded_file in enumerate(uploaded_files):
-            # Atualiza progresso
-            progress = (i + 1) / len(uploaded_files)
-            progress_bar.progress(progress)
-            status_text.text(f"Processando {i+1}/{len(uploaded_files)}: {uploaded_file.name}...")
-            
-            # Salva o arquivo temporariamente
-            temp_path = os.path.join(file_manager.settings.PDF_TO_PROCESS, uploaded_file.name)
-            with open(temp_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
-            
-            # Processa o PDF (SEM THREAD - a única abordagem correta no Streamlit)
-            success, message = process_pdf(
-                temp_path, 
-                st.session_state.user_id, 
-                st.session_state.username
-            )
-            results.append(message)
+    # Os bytes do upload vão para o spool do serviço (UPLOAD_SPOOL_DIR) até serem processados
+    for index, uploaded_file in enumerate(uploaded_files):
+        upload_service.submit(uploaded_file.getvalue(), uploaded_file.name, st.session_state.user_id, batch_id, index)
     
-    # Atualiza o estado da sessão com os resultados
-    st.session_state.processing_status = "completed"
-    st.session_state.processing_results = results
-    progress_bar.empty()
-    status_text.empty()
+    st.session_state.processing_batch = batch_id
+    st.session_state.processing_status = "processing"
+    st.session_state.processing_results = []
     st.rerun()  # Força uma atualização da interface
 
+def job_message(job):
+    """Mensagem exibida para um job do lote, conforme o estado"""
+    file_name = os.path.basename(job['pdf_path'])
+    if job['state'] == JobQueue.DONE:
+        return json.loads(job['result'])['message'] if job['result'] else f"✅ Processado: {file_name}"
+    if job['state'] == JobQueue.FAILED:
+        return job['last_error'] or f"❌ Erro ao processar {file_name}"
+    if job['state'] == JobQueue.RUNNING:
+        return f"🔄 Processando: {file_name}"
+    return f"⏳ Na fila: {file_name}"
+
+def show_processing_progress():
+    """Mostra o andamento real de cada arquivo do lote, lido da fila de jobs"""
+    # A fila vem do serviço de upload, criado uma vez por processo (não a cada reexecução do script)
+    jobs = get_upload_service(process_pdf).batch_jobs(st.session_state.processing_batch)
+    finished = [job for job in jobs if job['state'] in (JobQueue.DONE, JobQueue.FAILED)]
+    
+    if len(finished) == len(jobs):
+        st.session_state.processing_status = "completed"
+        st.session_state.processing_results = [job_message(job) for job in jobs]
+        st.session_state.processing_batch = None
+        st.rerun()
+    
+    st.info(f"🔄 Processamento em andamento: {len(finished)}/{len(jobs)} arquivo(s) concluído(s)")
+    st.progress(len(finished) / len(jobs))
+    for job in jobs:
+        st.text(job_message(job))
+
 def main_app():
     # Inicializa o estado da sessão
     init_session_state()
@@ -297,6 +318,7 @@ def main_app():
                 if st.button("💾 Salvar Credenciais do Google"):
                     user_settings = UserSettings(st.session_state.user_id, st.session_state.username)
                     user_settings.save_google_credentials(credentials_content)
+                    SHEETS_CLIENTS.invalidate(st.session_state.user_id)
                     st.session_state.needs_credentials = False
                     st.success("Credenciais do Google salvas com sucesso!")
                     st.rerun()
@@ -320,8 +342,9 @@ def main_app():
         if uploaded_files:
             st.success(f"✅ {len(uploaded_files)} arquivo(s) PDF selecionado(s).")
             
-            if st.button("⚡ Processar Todos os PDFs", key="process_btn"):
-                # Inicia o processamento (sem threads)
+            if st.button("⚡ Processar Todos os PDFs", key="process_btn",
+                         disabled=st.session_state.processing_status == "processing"):
+                # Enfileira para o serviço em segundo plano
                 process_pdfs(uploaded_files)
         
         # Mostra resultados do processamento
@@ -344,9 +367,8 @@ def main_app():
                     st.session_state.processing_results = []
                     st.rerun()
         
-        elif st.session_state.processing_status == "processing":
-            st.info("🔄 Processamento em andamento...")
-            st.spinner("Aguarde enquanto processamos seus PDFs...")
+        elif st.session_state.processing_status == "processing" and st.session_state.processing_batch:
+            show_processing_progress()
     
     else:
         if not st.session_state.authentication_status:
@@ -358,6 +380,11 @@ def main_app():
     st.markdown("---")
     st.markdown("*Sistema de Extração de Editais - Versão Multi-Usuário*")
     st.caption(f"Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+    
+    # Enquanto houver lote em andamento a página se atualiza sozinha (polling da fila de jobs)
+    if st.session_state.processing_status == "processing":
+        time.sleep(1)
+        st.rerun()
 
 # Inicializa o aplicativo
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+"""Benchmark de ponta a ponta sobre um corpus de editais, com tempo por etapa e comparação entre execuções.
+
+Para cada PDF mede abertura, extração do texto, _normalize_text, regex, fallback por palavras-chave,
+OCR e envio (para um stub local do Sheets). Mostra p50/p95/máx por etapa e documentos/s, grava os
+resultados em JSON e, com --compare, aponta as etapas que ficaram mais lentas que a execução anterior.
+
+Uso: python -m benchmarks.bench_corpus [pasta_ou_pdf ...] [--repeat 3] [--output resultado.json]
+                                       [--compare anterior.json] [--threshold 0.2] [--min-delta-ms 1]
+"""
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+from datetime import datetime
+from config.settings import Settings
+from core.sheets_client import SHEETS_CLIENTS
+from core.sheets_uploader import SheetsUploader
+from benchmarks.sheets_stub import SheetsStub
+from benchmarks.bench_patterns import DEFAULT_SOURCES, collect_pdfs
+
+STAGES = ["abertura", "texto", "normalizacao", "regex", "palavras_chave", "ocr", "envio"]
+
+
+def percentile(values, q):
+    """Percentil com interpolação linear (q entre 0 e 100)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def timed_method(processor, name, totals, stage):
+    """Substitui um método da instância por uma versão que soma o tempo gasto em `totals[stage]`"""
+    method = getattr(processor, name)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            totals[stage] += time.perf_counter() - start
+
+    setattr(processor, name, wrapper)
+
+
+def run_document(pdf_path, uploader):
+    """Processa um PDF etapa por etapa (sem cache de extração); retorna {etapa: segundos}"""
+    import pdfplumber
+    from core.pdf_processor import PDFProcessor
+
+    timings = dict.fromkeys(STAGES, 0.0)
+
+    start = time.perf_counter()
+    processor = PDFProcessor(pdf_path)
+    processor.cache = None
+    with pdfplumber.open(io.BytesIO(processor._get_data())) as pdf:
+        processor._page_count = len(pdf.pages)
+    timings["abertura"] = time.perf_counter() - start
+
+    # O OCR roda dentro da extração de texto e do fallback: o tempo dele é separado das outras etapas
+    timed_method(processor, "_ocr_pages", timings, "ocr")
+
+    start = time.perf_counter()
+    ocr_before = timings["ocr"]
+    raw_text = processor.extract_text()
+    timings["texto"] = time.perf_counter() - start - (timings["ocr"] - ocr_before)
+
+    start = time.perf_counter()
+    processor.text = processor._normalize_text(raw_text)
+    timings["normalizacao"] = time.perf_counter() - start
+
+    fields = [field for field in processor.settings.CELL_MAPPING.keys() if field != "Edital de Licitação"]
+    start = time.perf_counter()
+    data = {field: processor.patterns.extract_field(field, processor.text) for field in fields}
+    timings["regex"] = time.perf_counter() - start
+
+    missing = [field for field in fields if data[field] == "NÃO ENCONTRADO"]
+    start = time.perf_counter()
+    for field in missing:
+        data[field] = processor._extract_by_keywords(field, processor.text)
+    timings["palavras_chave"] = time.perf_counter() - start
+
+    if processor.settings.USE_OCR:
+        for field in missing:
+            if data[field] == "NÃO ENCONTRADO":
+                ocr_before = timings["ocr"]
+                start = time.perf_counter()
+                data[field] = processor._extract_with_ocr(field)
+                # Regex e palavras-chave sobre o texto do OCR também contam como OCR (sem somar o wrapper duas vezes)
+                timings["ocr"] = ocr_before + time.perf_counter() - start
+
+    start = time.perf_counter()
+    sent = uploader.update_sheet(data)
+    timings["envio"] = time.perf_counter() - start
+
+    found = sum(1 for value in data.values() if value != "NÃO ENCONTRADO")
+    return timings, found, len(fields), sent
+
+
+def summarize(samples, docs, elapsed):
+    stages = {}
+    for stage in STAGES + ["total"]:
+        values_ms = [sample[stage] * 1000 for sample in samples]
+        stages[stage] = {
+            "p50_ms": round(percentile(values_ms, 50), 3),
+            "p95_ms": round(percentile(values_ms, 95), 3),
+            "max_ms": round(max(values_ms, default=0.0), 3),
+        }
+    return {"etapas": stages, "documentos_por_s": round(docs / elapsed, 3) if elapsed else 0.0}
+
+
+def compare(current, previous, threshold, min_delta_ms=1.0):
+    """Etapas cujo p50 (ou p95) piorou mais que `threshold` (e mais que `min_delta_ms`) em relação à execução anterior"""
+    regressions = []
+    for stage, stats in current["etapas"].items():
+        before = previous.get("etapas", {}).get(stage)
+        if not before:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            # Diferenças de fração de milissegundo ficam dentro do ruído de medição
+            if stats[metric] > before[metric] * (1 + threshold) and stats[metric] - before[metric] > min_delta_ms:
+                regressions.append((stage, metric, before[metric], stats[metric]))
+
+    before_rate = previous.get("documentos_por_s")
+    if before_rate and current["documentos_por_s"] < before_rate / (1 + threshold):
+        regressions.append(("total", "documentos_por_s", before_rate, current["documentos_por_s"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES)
+    parser.add_argument("--repeat", type=int, default=3, help="passadas sobre o corpus")
+    parser.add_argument("--output", help="grava os resultados em JSON")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=0.2, help="piora tolerada (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="piora absoluta mínima para contar como regressão")
+    args = parser.parse_args(argv)
+
+    pdfs = collect_pdfs(args.sources)
+    if not pdfs:
+        print("❌ Nenhum PDF encontrado para o benchmark")
+        return 1
+
+    # O envio vai para o stub local: sem limitador nem backoff longos distorcendo a etapa
+    Settings.SHEETS_REQUESTS_PER_MINUTE = 60000
+    Settings.SHEETS_BACKOFF_BASE = 0.05
+    Settings.SHEETS_BACKOFF_MAX = 0.5
+
+    samples = []
+    documents = []
+    with SheetsStub() as stub:
+        SHEETS_CLIENTS.register(None, None, stub.service())
+        uploader = SheetsUploader()
+
+        start = time.perf_counter()
+        for round_number in range(max(1, args.repeat)):
+            for pdf_path in pdfs:
+                timings, found, total_fields, sent = run_document(pdf_path, uploader)
+                timings["total"] = sum(timings.values())
+                samples.append(timings)
+                if round_number == 0:
+                    documents.append({
+                        "documento": os.path.basename(pdf_path),
+                        "campos_encontrados": found,
+                        "campos": total_fields,
+                        "enviado": sent,
+                    })
+        elapsed = time.perf_counter() - start
+        uploader.close()
+
+    results = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "documentos": len(pdfs),
+        "passadas": max(1, args.repeat),
+        "use_ocr": Settings.USE_OCR,
+        **summarize(samples, len(samples), elapsed),
+        "por_documento": documents,
+    }
+
+    print(f"📚 {len(pdfs)} documento(s) x {results['passadas']} passada(s): "
+          f"{results['documentos_por_s']:.2f} documentos/s")
+    print(f"{'etapa':<16} {'p50 (ms)':>10} {'p95 (ms)':>10} {'máx (ms)':>10}")
+    for stage, stats in results["etapas"].items():
+        print(f"{stage:<16} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} {stats['max_ms']:>10.3f}")
+    for document in documents:
+        status = "✅" if document["enviado"] else "❌"
+        print(f"   {status} {document['documento']}: {document['campos_encontrados']}/{document['campos']} campos")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 Resultados gravados em {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        regressions = compare(results, previous, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n❌ Regressões acima de {args.threshold:.0%} em relação a {args.compare}:")
+            for stage, metric, before, after in regressions:
+                print(f"   {stage} {metric}: {before:.3f} -> {after:.3f}")
+            return 1
+        print(f"\n✅ Nenhuma regressão acima de {args.threshold:.0%} em relação a {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Vazão de _normalize_text: seis passadas (antes) x split/join e uma única varredura do re.
+
+Confere que a saída é idêntica no texto dos PDFs do corpus e em textos sintéticos com os casos
+de borda (controles, dígitos Unicode, hífens longos, espaços Unicode) antes de medir.
+
+Uso: python -m benchmarks.bench_normalize [pasta_ou_pdf ...] [--repeat N] [--scale N] [--fuzz N]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+from benchmarks.bench_patterns import DEFAULT_SOURCES, collect_pdfs
+
+
+def legacy_normalize(text):
+    """Reproduz a normalização antiga, uma passada por regra"""
+    text = text.replace("\n", " ")
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"([A-Za-z])(\d)", r"\1 \2", text)
+    text = re.sub(r"(\d)([A-Za-z])", r"\1 \2", text)
+    text = re.sub(r"[–—]", "-", text)
+    text = re.sub(r"[\x00-\x1f]", "", text)
+    return text.strip()
+
+
+def load_raw_texts(pdfs):
+    """Texto bruto (antes da normalização) de cada PDF, sem cache"""
+    from core.pdf_processor import PDFProcessor
+
+    texts = {}
+    for pdf_path in pdfs:
+        processor = PDFProcessor(pdf_path)
+        processor.cache = None
+        raw_text = processor.extract_text()
+        if raw_text.strip():
+            texts[os.path.basename(pdf_path)] = raw_text
+    return texts
+
+
+def fuzz_texts(count, seed=0):
+    """Textos aleatórios concentrados nos caracteres que a normalização trata de forma especial"""
+    alphabet = (
+        "aZk09 \t\n\r\x0b\x0c\x00\x01\x08\x1b\x1c\x1f–—-"
+        "\x85\u2028  ١٣²éÇ."
+    )
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        for _ in range(count)
+    ]
+
+
+def throughput(normalize, text, repeat):
+    """MB/s da melhor de `repeat` execuções"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        normalize(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text.encode("utf-8")) / best / (1024 * 1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scale", type=int, default=50, help="cópias do texto para simular editais longos")
+    parser.add_argument("--fuzz", type=int, default=20000, help="textos sintéticos para a checagem de equivalência")
+    args = parser.parse_args(argv)
+
+    from core.pdf_processor import PDFProcessor
+    normalize = PDFProcessor.__new__(PDFProcessor)._normalize_text
+
+    for i, text in enumerate(fuzz_texts(args.fuzz)):
+        expected = legacy_normalize(text)
+        if normalize(text) != expected:
+            print(f"❌ Saída diferente no texto sintético {i}: {text!r}")
+            return 1
+    print(f"✅ {args.fuzz} textos sintéticos com saída idêntica")
+
+    texts = load_raw_texts(collect_pdfs(args.sources))
+    if not texts:
+        print("❌ Nenhum PDF com texto encontrado para o benchmark")
+        return 1
+
+    print(f"{'documento':<60} {'KB':>8} {'antes (MB/s)':>13} {'agora (MB/s)':>13} {'ganho':>7}")
+    for name, text in texts.items():
+        if normalize(text) != legacy_normalize(text):
+            print(f"❌ Saída diferente em {name}")
+            return 1
+        long_text = text * args.scale
+        before = throughput(legacy_normalize, long_text, args.repeat)
+        after = throughput(normalize, long_text, args.repeat)
+        size_kb = len(long_text.encode("utf-8")) / 1024
+        print(f"{name[:60]:<60} {size_kb:>8.0f} {before:>13.1f} {after:>13.1f} {after / before:>6.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
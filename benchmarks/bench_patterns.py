@@ -0,0 +1,134 @@
+"""Micro-benchmark da extração por regex: padrões em string (antes) x registro compilado x scanner de âncoras.
+
+O ganho é o do registro, que é o caminho usado pelo PDFProcessor; o scanner de âncoras
+(benchmarks/field_scanner.py) só é medido aqui, e o resultado dos dois precisa ser o mesmo.
+
+Ao final lista os padrões com maior custo acumulado. --stress KB extrai também um texto longo sem
+hífens nem dígitos (o pior caso de backtracking de orgao_7 e cidade_estado_*), que deve terminar
+dentro de PATTERN_TIMEOUT por padrão.
+
+Uso: python -m benchmarks.bench_patterns [pasta_ou_pdf ...] [--repeat N] [--top N] [--stress KB]
+"""
+import re
+import os
+import sys
+import glob
+import time
+import argparse
+from config.patterns import ExtractionPatterns, PATTERN_REGISTRY
+from benchmarks.field_scanner import FIELD_SCANNER
+from utils.metrics import METRICS, pattern_costs
+
+DEFAULT_SOURCES = ["data/to_process", "data/processed"]
+
+
+def legacy_extract_field(field_name, text):
+    """Reproduz o caminho antigo: dicionário recriado a cada chamada e re.search com strings"""
+    patterns = {name: list(names) for name, names in ExtractionPatterns.FIELD_PATTERNS.items()}
+    for pattern_name in patterns.get(field_name, []):
+        pattern = ExtractionPatterns.COMMON_PATTERNS[pattern_name]
+        match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+        if match:
+            return ExtractionPatterns.postprocess_match(field_name, match)
+    return "NÃO ENCONTRADO"
+
+
+def collect_pdfs(sources):
+    pdfs = []
+    for source in sources:
+        if os.path.isdir(source):
+            pdfs.extend(sorted(glob.glob(os.path.join(source, "*.pdf"))))
+        elif source.lower().endswith(".pdf"):
+            pdfs.append(source)
+    return pdfs
+
+
+def load_texts(pdfs):
+    """Extrai e normaliza o texto de cada PDF (sem cache) para isolar o custo das regex"""
+    from core.pdf_processor import PDFProcessor
+
+    texts = {}
+    for pdf_path in pdfs:
+        processor = PDFProcessor(pdf_path)
+        processor.cache = None
+        raw_text = processor.extract_text()
+        if raw_text.strip():
+            texts[os.path.basename(pdf_path)] = processor._normalize_text(raw_text)
+    return texts
+
+
+def scanner_extract_all(text):
+    return FIELD_SCANNER.extract_all(text, ExtractionPatterns.FIELD_PATTERNS)
+
+
+def per_field(extract):
+    def extract_all(text):
+        return {field_name: extract(field_name, text) for field_name in ExtractionPatterns.FIELD_PATTERNS}
+    return extract_all
+
+
+def time_document(extract_all, text, repeat, purge):
+    best = float("inf")
+    for _ in range(repeat):
+        if purge:
+            re.purge()
+        start = time.perf_counter()
+        extract_all(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("sources", nargs="*", default=DEFAULT_SOURCES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--top", type=int, default=10, help="padrões mais caros exibidos")
+    parser.add_argument("--stress", type=int, default=0, metavar="KB", help="texto patológico extraído ao final")
+    args = parser.parse_args(argv)
+
+    texts = load_texts(collect_pdfs(args.sources))
+    if not texts:
+        print("❌ Nenhum PDF com texto encontrado para o benchmark")
+        return 1
+
+    legacy_all = per_field(legacy_extract_field)
+    compiled_all = per_field(PATTERN_REGISTRY.extract_field)
+
+    print(f"{'documento':<60} {'antes (ms)':>11} {'frio (ms)':>10} {'registro (ms)':>14} {'scanner (ms)':>13} {'ganho':>7}")
+    totals = [0.0, 0.0, 0.0, 0.0]
+    for name, text in texts.items():
+        expected = legacy_all(text)
+        assert compiled_all(text) == expected, name
+        assert scanner_extract_all(text) == expected, name
+
+        legacy = time_document(legacy_all, text, args.repeat, purge=False)
+        legacy_cold = time_document(legacy_all, text, args.repeat, purge=True)
+        compiled = time_document(compiled_all, text, args.repeat, purge=False)
+        scanned = time_document(scanner_extract_all, text, args.repeat, purge=False)
+        totals[0] += legacy
+        totals[1] += legacy_cold
+        totals[2] += compiled
+        totals[3] += scanned
+        print(f"{name[:60]:<60} {legacy * 1000:>11.3f} {legacy_cold * 1000:>10.3f} "
+              f"{compiled * 1000:>14.3f} {scanned * 1000:>13.3f} {legacy / compiled:>6.2f}x")
+
+    count = len(texts)
+    print(f"\nMédia por documento: antes {totals[0] / count * 1000:.3f} ms | "
+          f"antes com cache do re frio {totals[1] / count * 1000:.3f} ms | "
+          f"registro {totals[2] / count * 1000:.3f} ms | "
+          f"scanner {totals[3] / count * 1000:.3f} ms")
+
+    if args.stress:
+        text = ("Contratação de empresa especializada para fornecimento de materiais " * 16 * args.stress)[:args.stress * 1024]
+        start = time.perf_counter()
+        scanner_extract_all(text)
+        print(f"\nTexto patológico de {args.stress} KB extraído em {time.perf_counter() - start:.2f}s")
+
+    print(f"\n{'padrão':<24} {'execuções':>10} {'total (ms)':>11} {'média (ms)':>11} {'abortos':>8}")
+    for name, runs, seconds, aborted in pattern_costs(METRICS, args.top):
+        print(f"{name:<24} {runs:>10} {seconds * 1000:>11.1f} {seconds / runs * 1000:>11.3f} {aborted:>8}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Envio para o Sheets contra um stub local que injeta 429/503: confere retentativas, backoff e limitador.
+
+Uso: python -m benchmarks.bench_sheets_retry [--docs N] [--fail-rate 0.3] [--rpm 600] [--sink cells|rows]
+"""
+import sys
+import time
+import argparse
+from config.settings import Settings
+from core.sheets_client import SHEETS_CLIENTS
+from core.sheets_uploader import SheetsUploader, SheetsRowSink
+from utils.sheets_retry import SHEETS_STATS
+from benchmarks.sheets_stub import SheetsStub
+
+
+def sample_data(i):
+    return {
+        "Orgão": f"PREFEITURA MUNICIPAL {i}",
+        "CNPJ Órgão": f"{i:02d}.345.678/0001-90",
+        "Nº Pregão e Processo": f"PROCESSO ADMINISTRATIVO No {i}/2024 | PREGÃO ELETRÔNICO No {i}/2024",
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    parser.add_argument("--rpm", type=int, default=600, help="substitui SHEETS_REQUESTS_PER_MINUTE")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--sink", choices=["cells", "rows"], default="cells")
+    args = parser.parse_args(argv)
+
+    # Backoff curto para o benchmark não passar a maior parte do tempo dormindo
+    Settings.RETRY_ATTEMPTS = args.retries
+    Settings.SHEETS_REQUESTS_PER_MINUTE = args.rpm
+    Settings.SHEETS_BACKOFF_BASE = 0.05
+    Settings.SHEETS_BACKOFF_MAX = 0.5
+
+    with SheetsStub(fail_rate=args.fail_rate, seed=42) as stub:
+        SHEETS_CLIENTS.register(None, None, stub.service())
+        uploader = SheetsRowSink(flush_rows=5, flush_seconds=60) if args.sink == "rows" else SheetsUploader()
+
+        SHEETS_STATS.reset()
+        start = time.perf_counter()
+        sent = 0
+        for i in range(args.docs):
+            if uploader.update_sheet(sample_data(i)):
+                sent += 1
+        flushed = uploader.close()
+        elapsed = time.perf_counter() - start
+
+    stats = SHEETS_STATS.snapshot()
+    print(f"📤 {sent}/{args.docs} documentos aceitos em {elapsed:.2f}s (destino: {args.sink}, flush final: {flushed})")
+    print(f"🌐 {len(stub.requests)} requisições ao stub, "
+          f"{sum(1 for *_, status in stub.requests if status != 200)} com falha injetada")
+    for name, value in stats.items():
+        print(f"   {name}: {value}")
+
+    if args.sink == "rows":
+        data_rows = len(stub.rows.get(uploader.user_settings.SPREADSHEET_ID, [])) - 1
+        print(f"🧾 Linhas gravadas (sem cabeçalho): {data_rows}")
+        return 0 if data_rows == args.docs else 1
+    return 0 if sent == args.docs else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Tempo de importação dos pontos de entrada (main.py e app.py) contra um orçamento por entrada.
+
+Roda `python -X importtime -c "import <módulo>"` em um processo novo (cold start do interpretador),
+mostra os módulos mais caros e falha se o tempo passar do orçamento ou se alguma dependência
+pesada (OCR, PDF, Google) for carregada já na inicialização.
+
+Uso: python -m benchmarks.bench_startup [--repeat 3] [--top 10] [--budget main=200] [--entry main]
+"""
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+# Orçamento (ms) do tempo de importação de cada ponto de entrada; atualize junto com a mudança que o justificar
+BUDGETS_MS = {
+    "main": 200,
+    "app": 1500,
+}
+
+# Só devem ser importados quando o caminho que os usa roda de fato (OCR, fallback do PyPDF2, envio)
+LAZY_MODULES = (
+    "pdfplumber", "PyPDF2", "pytesseract", "pdf2image", "PIL",
+    "googleapiclient", "google_auth_oauthlib", "google.auth.transport.requests",
+)
+# O próprio Streamlit importa o Pillow (st.image): não é uma importação do projeto
+ALLOWED_AT_STARTUP = {
+    "app": ("PIL",),
+}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(module):
+    """Importa `module` em um interpretador novo; retorna {módulo: (self µs, cumulativo µs)}"""
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"código {proc.returncode}"
+        raise RuntimeError(error)
+
+    # O importtime lista cada módulo ao terminar de importá-lo: a subárvore do ponto de entrada são
+    # as linhas entre a última importação de nível zero anterior (site, encodings...) e a dele
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+        if not match.group(3) and match.group(4) != module:
+            modules = {}
+    return modules
+
+
+def lazy_violations(entry, modules):
+    lazy_modules = [lazy for lazy in LAZY_MODULES if lazy not in ALLOWED_AT_STARTUP.get(entry, ())]
+    return sorted(
+        name for name in modules
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in lazy_modules)
+    )
+
+
+def parse_budgets(values):
+    budgets = dict(BUDGETS_MS)
+    for value in values or []:
+        entry, _, ms = value.partition("=")
+        budgets[entry] = float(ms)
+    return budgets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entry", action="append", help="ponto de entrada (padrão: todos com orçamento)")
+    parser.add_argument("--repeat", type=int, default=3, help="execuções por entrada; vale a mais rápida")
+    parser.add_argument("--top", type=int, default=10, help="módulos mais caros exibidos")
+    parser.add_argument("--budget", action="append", metavar="ENTRADA=MS", help="substitui um orçamento")
+    args = parser.parse_args(argv)
+
+    budgets = parse_budgets(args.budget)
+    failed = False
+    for entry in args.entry or list(budgets):
+        try:
+            runs = [import_profile(entry) for _ in range(max(1, args.repeat))]
+        except RuntimeError as e:
+            print(f"⚠️ {entry}: não foi possível importar ({e})")
+            failed = True
+            continue
+
+        modules = min(runs, key=lambda run: run.get(entry, (0, 0))[1])
+        total_ms = modules.get(entry, (0, 0))[1] / 1000
+        budget_ms = budgets.get(entry)
+        within = budget_ms is None or total_ms <= budget_ms
+        status = "✅" if within else "❌"
+        print(f"\n{status} {entry}: {total_ms:.1f} ms (orçamento: {budget_ms if budget_ms is not None else '-'} ms)")
+
+        slowest = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (self_us, cumulative_us) in slowest[1:args.top + 1]:
+            print(f"   {cumulative_us / 1000:8.1f} ms  (próprio {self_us / 1000:6.1f} ms)  {name}")
+
+        violations = lazy_violations(entry, modules)
+        if violations:
+            print(f"   ❌ Dependências pesadas carregadas na inicialização: {', '.join(violations)}")
+        failed = failed or not within or bool(violations)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
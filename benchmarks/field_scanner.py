@@ -0,0 +1,118 @@
+"""Scanner de âncoras: localiza em uma única passada os literais iniciais dos padrões e roda cada um só nessas posições.
+
+Foi a primeira tentativa de extração em tempo linear; o registro de padrões (com os localizadores de
+início de sequência de PATTERN_RUN_STARTS) o substituiu no PDFProcessor por ser mais rápido. Fica aqui
+só para o bench_patterns comparar os dois caminhos e conferir que extraem os mesmos valores.
+"""
+import re
+from collections import defaultdict
+from config.patterns import PATTERN_REGISTRY
+from utils.metrics import METRICS
+
+# Literal com que todo match do padrão começa (padrões sem âncora varrem o texto inteiro)
+PATTERN_ANCHORS = {
+    "orgao_1": "ÓRGÃO", "orgao_2": "ORGÃO", "orgao_3": "ENTIDADE", "orgao_4": "PREFEITURA",
+    "orgao_5": "SECRETARIA", "orgao_6": "GOVERNO",
+    "cnpj_1": "CNPJ", "cnpj_2": "CNPJ", "cnpj_3": "INSCRIÇÃO",
+    "cidade_estado_3": "Local", "cidade_estado_4": "Município:", "cidade_estado_5": "Endereço",
+    "processo_1": "Processo", "processo_2": "PROCESSO", "processo_3": "Processo",
+    "pregao_1": "PREGÃO", "pregao_2": "Processo", "pregao_3": "Nº", "processo_pregao_1": "PROCESSO",
+    "telefone_1": "Fone", "telefone_2": "Telefone", "telefone_3": "Contato",
+    "email_1": "E-mail", "email_2": "e-mail", "email_3": "contato@",
+    "prazo_pagamento_1": "Prazo", "prazo_pagamento_2": "Forma",
+    "plataforma_1": "Plataforma", "plataforma_2": "Plataforma", "plataforma_3": "Plataforma", "plataforma_4": "Plataforma",
+    "uasg_1": "UASG", "uasg_2": "Código",
+    "modalidade_1": "Modalidade", "modalidade_2": "Tipo", "modalidade_3": "REGISTRO DE PREÇO", "modalidade_4": "MODALIDADE",
+    "prazo_entrega_1": "Prazo", "prazo_entrega_2": "Prazo", "prazo_entrega_3": "Entrega",
+    "local_entrega_1": "Local", "local_entrega_2": "Endereço", "local_entrega_3": "Entrega", "local_entrega_4": "Local",
+    "validade_proposta_1": "Validade", "validade_proposta_2": "Proposta", "validade_proposta_3": "Validade",
+    "catalogo_tecnico_1": "Catálogo", "catalogo_tecnico_2": "Catálogo", "catalogo_tecnico_3": "Necessário",
+    "catalogo_tecnico_4": "É", "catalogo_tecnico_5": "Catálogo",
+    "modo_disputa_1": "Modo", "modo_disputa_2": "Disputa", "modo_disputa_3": "MODALIDADE",
+    "modo_disputa_4": "MODO", "modo_disputa_5": "MODO",
+}
+
+
+class FieldScanner:
+    """Localiza em uma única passada as âncoras de todos os campos e roda cada padrão só nessas posições"""
+
+    def __init__(self, registry=None, pattern_anchors=None):
+        self.registry = registry or PATTERN_REGISTRY
+        self.pattern_anchors = PATTERN_ANCHORS if pattern_anchors is None else pattern_anchors
+
+        anchors = sorted({
+            self.pattern_anchors[compiled.name]
+            for field_name in self.registry.fields()
+            for compiled in self.registry.get(field_name)
+            if compiled.name in self.pattern_anchors
+        }, key=len, reverse=True)
+
+        # Lookahead de largura zero: encontra também âncoras sobrepostas ("fone" dentro de "Telefone")
+        alternation = "|".join(re.escape(anchor) for anchor in anchors)
+        self._scan_regex = re.compile(f"(?=(?:{alternation}))", self.registry.flags)
+
+        # Na mesma posição podem começar várias âncoras ("Contato" e "contato@")
+        self._anchor_regexes = {anchor: re.compile(re.escape(anchor), self.registry.flags) for anchor in anchors}
+        self._anchors_by_initial = defaultdict(list)
+        for anchor in anchors:
+            self._anchors_by_initial[anchor[0].lower()].append(anchor)
+
+        # Localizadores de início de sequência (padrões sem literal inicial), um por classe de caracteres
+        self._run_finders = list({
+            id(compiled.run_start): compiled.run_start
+            for field_name in self.registry.fields()
+            for compiled in self.registry.get(field_name)
+            if compiled.run_start is not None
+        }.values())
+
+    def scan(self, text):
+        """Mapeia cada âncora (e cada localizador de início de sequência) para as posições, em ordem, no texto"""
+        hits = defaultdict(list)
+        for match in self._scan_regex.finditer(text):
+            position = match.start()
+            # Inicial com dobra de caixa especial (ex.: "ſ" casa com "s"): confere todas as âncoras
+            candidates = self._anchors_by_initial.get(text[position].lower()) or self._anchor_regexes
+            for anchor in candidates:
+                if self._anchor_regexes[anchor].match(text, position):
+                    hits[anchor].append(position)
+        for finder in self._run_finders:
+            hits[finder] = [match.end() for match in finder.finditer(text)]
+        return hits
+
+    def _search(self, compiled, text, hits):
+        """Equivale a compiled.regex.search(text), mas só testa as posições da âncora ou os inícios de sequência"""
+        key = self.pattern_anchors.get(compiled.name) or compiled.run_start
+        if key is None:
+            return compiled.find(text)
+        return compiled.find(text, hits.get(key, ()))
+
+    def match_field(self, field_name, text, hits=None):
+        """Retorna (padrão que casou, valor) respeitando a ordem de fallback; (None, "NÃO ENCONTRADO") se nenhum casar"""
+        if hits is None:
+            hits = self.scan(text)
+
+        tried = 0
+        for compiled in self.registry.get(field_name):
+            tried += 1
+            match = self._search(compiled, text, hits)
+            if match:
+                METRICS.increment("padroes_testados", tried)
+                return compiled, compiled.postprocess(match)
+        METRICS.increment("padroes_testados", tried)
+        return None, "NÃO ENCONTRADO"
+
+    def extract_field(self, field_name, text, hits=None):
+        """Extrai um campo respeitando a mesma ordem de fallback do registro"""
+        return self.match_field(field_name, text, hits)[1]
+
+    def extract_all(self, text, fields=None):
+        """Extrai vários campos com uma única varredura de âncoras"""
+        hits = self.scan(text)
+        return {
+            field_name: self.extract_field(field_name, text, hits)
+            for field_name in (fields or self.registry.fields())
+        }
+
+
+# Scanner compartilhado (construído uma vez a partir do registro de padrões)
+FIELD_SCANNER = FieldScanner()
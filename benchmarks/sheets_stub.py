@@ -0,0 +1,118 @@
+"""Servidor local que imita os endpoints de valores da API do Google Sheets e injeta respostas 429/503.
+
+Serve para exercitar o envio (retentativas, backoff e limitador) sem rede e sem cota real.
+"""
+import json
+import random
+import threading
+from urllib.parse import urlparse, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class SheetsStub:
+    """Imita values.batchUpdate, values.append e values.get, falhando conforme `failures` ou `fail_rate`"""
+
+    def __init__(self, failures=None, fail_rate=0.0, fail_statuses=(429, 503), retry_after=None, seed=0):
+        self.failures = list(failures or [])  # status a devolver nas próximas requisições (None = sucesso)
+        self.fail_rate = fail_rate
+        self.fail_statuses = fail_statuses
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.cells = {}  # (planilha, intervalo) -> valores
+        self.rows = {}  # planilha -> linhas acrescentadas
+        self.requests = []  # (método, caminho, status)
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                stub._handle(self, json.loads(self.rfile.read(length) or b'{}'))
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def service(self):
+        """Serviço do googleapiclient apontado para o stub (descoberta estática, sem credenciais)"""
+        import httplib2
+        from googleapiclient.discovery import build
+        return build('sheets', 'v4', http=httplib2.Http(), static_discovery=True,
+                     client_options={'api_endpoint': self.url})
+
+    def _next_status(self):
+        with self._lock:
+            if self.failures:
+                return self.failures.pop(0) or 200
+            if self.fail_rate and self._random.random() < self.fail_rate:
+                return self._random.choice(self.fail_statuses)
+            return 200
+
+    def _respond(self, handler, status, payload):
+        body = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        if status == 429 and self.retry_after is not None:
+            handler.send_header('Retry-After', str(self.retry_after))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _handle(self, handler, body):
+        path = unquote(urlparse(handler.path).path)
+        status = self._next_status()
+        with self._lock:
+            self.requests.append((handler.command, path, status))
+
+        if status != 200:
+            message = 'Quota exceeded' if status == 429 else 'Service unavailable'
+            self._respond(handler, status, {'error': {'code': status, 'message': message}})
+            return
+
+        # /v4/spreadsheets/{id}/values:batchUpdate | /values/{range}:append | /values/{range}
+        parts = path.split('/', 4)
+        if len(parts) < 5 or parts[2] != 'spreadsheets':
+            self._respond(handler, 404, {'error': {'code': 404, 'message': 'Not found'}})
+            return
+        spreadsheet_id, rest = parts[3], parts[4]
+
+        with self._lock:
+            if rest == 'values:batchUpdate':
+                for item in body.get('data', []):
+                    self.cells[(spreadsheet_id, item['range'])] = item['values']
+                payload = {'spreadsheetId': spreadsheet_id, 'totalUpdatedCells': len(body.get('data', []))}
+            elif rest.endswith(':append'):
+                rows = self.rows.setdefault(spreadsheet_id, [])
+                rows.extend(body.get('values', []))
+                payload = {'spreadsheetId': spreadsheet_id, 'updates': {'updatedRows': len(body.get('values', []))}}
+            else:
+                rows = self.rows.get(spreadsheet_id)
+                payload = {'range': rest[len('values/'):], 'values': rows[:1]} if rows else {}
+
+        self._respond(handler, 200, payload)
@@ -1,4 +1,13 @@
 import re
+import time
+import signal
+import logging
+import threading
+from contextlib import contextmanager
+from config.settings import Settings
+from utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
 
 class ExtractionPatterns:
     """Padrões regex especializados para extração de editais brasileiros com base em variações reais"""
@@ -110,33 +119,278 @@ class ExtractionPatterns:
         "modo_disputa_6": r"(\w+[\s,;]?\s*(\w+))",
     }
     
+    # Ordem de fallback dos padrões de cada campo
+    FIELD_PATTERNS = {
+        "Orgão": ["orgao_1", "orgao_2", "orgao_3", "orgao_4", "orgao_5", "orgao_6", "orgao_7"],
+        "CNPJ Órgão": ["cnpj_1", "cnpj_2", "cnpj_3", "cnpj_4", "cnpj_5"],
+        "Cidade e Estado": ["cidade_estado_1", "cidade_estado_2", "cidade_estado_3", "cidade_estado_4", "cidade_estado_5", "cidade_estado_6"],
+        "Nº Pregão e Processo": ["processo_1", "processo_2", "processo_3", "pregao_1", "pregao_2", "pregao_3", "processo_pregao_1"],
+        "Telefones": ["telefone_1", "telefone_2", "telefone_3", "telefone_4", "telefone_5", "telefone_6"],
+        "E-mail": ["email_1", "email_2", "email_3", "email_4"],
+        "Prazo de pagamento": ["prazo_pagamento_1", "prazo_pagamento_2", "prazo_pagamento_3", "prazo_pagamento_4"],
+        "Plataforma": ["plataforma_1", "plataforma_2", "plataforma_3", "plataforma_4"],
+        "UASG": ["uasg_1", "uasg_2", "uasg_3"],
+        "Modalidade de compra": ["modalidade_1", "modalidade_2", "modalidade_3", "modalidade_4", "modalidade_5"],
+        "Prazo de entrega": ["prazo_entrega_1", "prazo_entrega_2", "prazo_entrega_3", "prazo_entrega_4", "prazo_entrega_5"],
+        "Local de entrega": ["local_entrega_1", "local_entrega_2", "local_entrega_3", "local_entrega_4"],
+        "Validade da proposta": ["validade_proposta_1", "validade_proposta_2", "validade_proposta_3", "validade_proposta_4"],
+        "Catálogo técnico": ["catalogo_tecnico_1", "catalogo_tecnico_2", "catalogo_tecnico_3", "catalogo_tecnico_4", "catalogo_tecnico_5"],
+        "Modo de Disputa": ["modo_disputa_1", "modo_disputa_2", "modo_disputa_3", "modo_disputa_4", "modo_disputa_5", "modo_disputa_6"],
+    }
+    
+    # Palavras-chave usadas quando nenhum padrão regex casa (ordem de tentativa)
+    FIELD_KEYWORDS = {
+        "Orgão": ["órgão", "entidade", "prefeitura", "secretaria", "governo"],
+        "CNPJ Órgão": ["cnpj", "inscrição", "código"],
+        "Cidade e Estado": ["município", "cidade", "estado", "uf", "localização"],
+        "Nº Pregão e Processo": ["pregão", "processo", "número", "nº"],
+        "Telefones": ["telefone", "fones", "contato", "lado", "fale conosco"],
+        "E-mail": ["e-mail", "email", "contato", "fale conosco"],
+        "Prazo de pagamento": ["prazo", "pagamento", "vencimento", "pago"],
+        "Plataforma": ["plataforma", "sistema", "ferramenta", "sistema de licitação"],
+        "UASG": ["uasg", "código uasg", "código uasg"],
+        "Modalidade de compra": ["modalidade", "tipo", "licitação", "compra"],
+        "Prazo de entrega": ["prazo", "entrega", "entregas", "recepção"],
+        "Local de entrega": ["local", "entrega", "recepção", "fornecimento"],
+        "Validade da proposta": ["validade", "proposta", "válido", "prazo"],
+        "Catálogo técnico": ["catálogo", "técnic", "especificação", "ficha"],
+        "Modo de Disputa": ["modo", "disputa", "aberto", "fechado"]
+    }
+    
+    # Padrões sem literal inicial que começam por uma sequência gulosa de uma classe de caracteres.
+    # Se o padrão não casa a partir do início de uma sequência, também não casa a partir de nenhum
+    # ponto dentro dela (os finais possíveis do grupo são um subconjunto): basta testar esses inícios,
+    # que o localizador devolve no fim de cada casamento. O resultado é o mesmo do search, em tempo linear
+    PATTERN_RUN_STARTS = {
+        "orgao_7": r"(?<![A-Za-z\s])\s*(?=[A-Z])",
+        "cidade_estado_1": r"(?<![\w\s\-])(?=[\w\s\-])",
+        "cidade_estado_2": r"(?<![\w\s\-])(?=[\w\s\-])",
+    }
+    
+    # Padrões genéricos de último recurso: o valor encontrado não é considerado confiável
+    WEAK_PATTERNS = {
+        "orgao_7", "cidade_estado_1", "cidade_estado_2", "cidade_estado_6",
+        "telefone_5", "telefone_6", "email_4", "uasg_3", "modalidade_5",
+        "prazo_entrega_5", "validade_proposta_4", "modo_disputa_6",
+    }
+    
+    FLAGS = re.IGNORECASE | re.MULTILINE
+    
+    @staticmethod
+    def postprocess_match(field_name, match):
+        """Converte um match em valor de célula, tratando os campos compostos"""
+        groups = match.groups()
+        
+        if field_name == "Nº Pregão e Processo":
+            if len(groups) >= 2:
+                processo = groups[0].strip()
+                pregao = groups[1].strip()
+                return f"PROCESSO ADMINISTRATIVO No {processo} | PREGÃO ELETRÔNICO No {pregao}"
+            # Mantém o rótulo ("PROCESSO ADMINISTRATIVO No ...") que o uploader abrevia
+            return match.group(0).strip()
+        
+        if field_name == "Telefones" and len(groups) >= 3:
+            return f"({groups[0]}) {groups[1]}-{groups[2]}"
+        
+        if field_name == "Cidade e Estado" and len(groups) >= 2:
+            return f"{groups[0].strip()} - {groups[1].strip()}"
+        
+        if groups and groups[0]:
+            return groups[0].strip()
+        return match.group(0).strip()
+    
     @classmethod
     def extract_field(cls, field_name, text):
         """Extrai um campo específico usando múltiplos padrões de fallback"""
-        patterns = {
-            "Orgão": ["orgao_1", "orgao_2", "orgao_3", "orgao_4", "orgao_5", "orgao_6", "orgao_7"],
-            "CNPJ Órgão": ["cnpj_1", "cnpj_2", "cnpj_3", "cnpj_4", "cnpj_5"],
-            "Cidade e Estado": ["cidade_estado_1", "cidade_estado_2", "cidade_estado_3", "cidade_estado_4", "cidade_estado_5", "cidade_estado_6"],
-            "Nº Pregão e Processo": ["processo_1", "processo_2", "processo_3", "pregao_1", "pregao_2", "pregao_3", "processo_pregao_1"],
-            "Telefones": ["telefone_1", "telefone_2", "telefone_3", "telefone_4", "telefone_5", "telefone_6"],
-            "E-mail": ["email_1", "email_2", "email_3", "email_4"],
-            "Prazo de pagamento": ["prazo_pagamento_1", "prazo_pagamento_2", "prazo_pagamento_3", "prazo_pagamento_4"],
-            "Plataforma": ["plataforma_1", "plataforma_2", "plataforma_3", "plataforma_4"],
-            "UASG": ["uasg_1", "uasg_2", "uasg_3"],
-            "Modalidade de compra": ["modalidade_1", "modalidade_2", "modalidade_3", "modalidade_4", "modalidade_5"],
-            "Prazo de entrega": ["prazo_entrega_1", "prazo_entrega_2", "prazo_entrega_3", "prazo_entrega_4", "prazo_entrega_5"],
-            "Local de entrega": ["local_entrega_1", "local_entrega_2", "local_entrega_3", "local_entrega_4"],
-            "Validade da proposta": ["validade_proposta_1", "validade_proposta_2", "validade_proposta_3", "validade_proposta_4"],
-            "Catálogo técnico": ["catalogo_tecnico_1", "catalogo_tecnico_2", "catalogo_tecnico_3", "catalogo_tecnico_4", "catalogo_tecnico_5"],
-            "Modo de Disputa": ["modo_disputa_1", "modo_disputa_2", "modo_disputa_3", "modo_disputa_4", "modo_disputa_5", "modo_disputa_6"],
-        }
+        return PATTERN_REGISTRY.extract_field(field_name, text)
+
+
+class PatternTimeout(Exception):
+    """Padrão abortado por estourar o orçamento de tempo"""
+
+
+_aborts = threading.local()
+_unbounded_warned = False
+
+def aborted_patterns():
+    """Padrões abortados até agora na thread atual: comparar antes/depois diz se a extração de um documento ficou incompleta"""
+    return getattr(_aborts, "count", 0)
+
+def _warn_unbounded():
+    """Avisa uma única vez que, fora da thread principal, os padrões rodam sem PATTERN_TIMEOUT"""
+    global _unbounded_warned
+    if not _unbounded_warned:
+        _unbounded_warned = True
+        logger.warning("⚠️ Módulo regex não instalado: fora da thread principal os padrões rodam sem PATTERN_TIMEOUT "
+                       "(pip install regex)")
+
+def _raise_timeout(signum, frame):
+    raise PatternTimeout()
+
+def _can_alarm():
+    """SIGALRM só interrompe o re na thread principal, em sistemas com setitimer"""
+    return (hasattr(signal, "setitimer") and hasattr(signal, "pthread_sigmask")
+            and threading.current_thread() is threading.main_thread())
+
+@contextmanager
+def _alarm(seconds):
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        # Com SIGALRM bloqueado: devolve o handler anterior, desarma o timer e descarta um alarme
+        # que já tenha chegado (ele não pode cair no handler padrão, que encerraria o processo)
+        mask = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})
+        try:
+            signal.signal(signal.SIGALRM, previous)
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            if signal.SIGALRM in signal.sigpending():
+                signal.sigwait({signal.SIGALRM})
+        finally:
+            signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+
+
+class CompiledPattern:
+    """Padrão regex pré-compilado, com o pós-processamento do seu campo"""
+    
+    __slots__ = ("name", "field_name", "pattern", "flags", "regex", "run_start", "weak", "timeout", "_bounded")
+    
+    def __init__(self, name, field_name, pattern, flags, weak=False, timeout=0.0, run_start=None):
+        self.name = name
+        self.field_name = field_name
+        self.pattern = pattern
+        self.flags = flags
+        self.regex = re.compile(pattern, flags)
+        # Localizador (regex compilada) dos inícios de sequência em que o padrão pode começar
+        self.run_start = run_start
+        self.weak = weak
+        self.timeout = timeout
+        self._bounded = None
+    
+    def postprocess(self, match):
+        return ExtractionPatterns.postprocess_match(self.field_name, match)
+    
+    def find(self, text, positions=None):
+        """search no texto inteiro (ou match em cada uma das `positions`) dentro do orçamento de tempo
         
-        field_patterns = patterns.get(field_name, [])
-        for pattern_name in field_patterns:
-            pattern = cls.COMMON_PATTERNS[pattern_name]
-            match = re.search(pattern, text, re.IGNORECASE | re.MULTILINE)
+        Um padrão que estoura o orçamento é abortado e tratado como se não tivesse casado; o tempo
+        gasto e os abortos ficam acumulados por padrão nas métricas.
+        """
+        start = time.perf_counter()
+        if positions is None and self.run_start is not None:
+            positions = self.run_starts(text)
+        try:
+            if not self.timeout or (positions is not None and not positions):
+                return self._find(self.regex, text, positions, None)
+            if _can_alarm():
+                with _alarm(self.timeout):
+                    return self._find(self.regex, text, positions, None)
+            # Fora da thread principal (upload do Streamlit, Windows) só o módulo regex aceita prazo
+            bounded = self._bounded_regex()
+            if not bounded:
+                METRICS.increment("padroes_sem_limite", padrao=self.name)
+            return self._find(bounded or self.regex, text, positions, start + self.timeout if bounded else None)
+        except (PatternTimeout, TimeoutError):
+            _aborts.count = aborted_patterns() + 1
+            METRICS.increment("padroes_abortados", padrao=self.name)
+            logger.warning(f"⏱️ Padrão {self.name} abortado após {self.timeout}s; tentando o próximo")
+            return None
+        finally:
+            METRICS.increment("padrao_execucoes", padrao=self.name)
+            METRICS.increment("padrao_segundos", time.perf_counter() - start, padrao=self.name)
+    
+    def run_starts(self, text):
+        return [match.end() for match in self.run_start.finditer(text)]
+    
+    def _bounded_regex(self):
+        """O mesmo padrão compilado pelo módulo regex (opcional), que aceita timeout em search/match"""
+        if self._bounded is None:
+            try:
+                import regex
+                self._bounded = regex.compile(self.pattern, self.flags)
+            except ImportError:
+                self._bounded = False
+                _warn_unbounded()
+        return self._bounded
+    
+    def _find(self, compiled, text, positions, deadline):
+        if positions is None:
+            return compiled.search(text, **self._budget(deadline))
+        # O prazo vale para todas as posições juntas, não para cada uma
+        for position in positions:
+            match = compiled.match(text, position, **self._budget(deadline))
             if match:
-                # Processamento especial para campos compostos
-                if field_name == "Nº Pregão e Processo":
-                    if len(match.groups()) >= 2:
-                        processo = match.group
\ No newline at end of file
+                return match
+        return None
+    
+    @staticmethod
+    def _budget(deadline):
+        """Argumento timeout do módulo regex com o tempo que resta até o prazo"""
+        if deadline is None:
+            return {}
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise PatternTimeout()
+        return {"timeout": remaining}
+    
+    def extract(self, text):
+        """Retorna o valor extraído ou None se o padrão não casar"""
+        match = self.find(text)
+        if match:
+            return self.postprocess(match)
+        return None
+
+
+class PatternRegistry:
+    """Padrões compilados uma única vez e indexados por campo, na ordem de fallback"""
+    
+    def __init__(self, patterns, field_patterns, flags, weak_patterns=(), timeout=0.0, run_starts=None):
+        run_starts = run_starts or {}
+        self.flags = flags
+        # Padrões com a mesma classe compartilham o localizador compilado
+        finders = {finder: re.compile(finder, flags) for finder in set(run_starts.values())}
+        self._by_field = {
+            field_name: [
+                CompiledPattern(
+                    name, field_name, patterns[name], flags, name in weak_patterns, timeout,
+                    finders.get(run_starts.get(name))
+                )
+                for name in names
+            ]
+            for field_name, names in field_patterns.items()
+        }
+    
+    def fields(self):
+        return list(self._by_field.keys())
+    
+    def get(self, field_name):
+        """Lista ordenada de padrões compilados de um campo"""
+        return self._by_field.get(field_name, [])
+    
+    def match_field(self, field_name, text):
+        """Retorna (padrão que casou, valor) na ordem de fallback; (None, "NÃO ENCONTRADO") se nenhum casar"""
+        tried = 0
+        for compiled in self.get(field_name):
+            tried += 1
+            value = compiled.extract(text)
+            if value is not None:
+                METRICS.increment("padroes_testados", tried)
+                return compiled, value
+        METRICS.increment("padroes_testados", tried)
+        return None, "NÃO ENCONTRADO"
+    
+    def extract_field(self, field_name, text):
+        """Extrai um campo testando os padrões compilados em ordem de fallback"""
+        return self.match_field(field_name, text)[1]
+
+
+# Registro compartilhado (PDFProcessor, modos em lote, benchmarks)
+PATTERN_REGISTRY = PatternRegistry(
+    ExtractionPatterns.COMMON_PATTERNS,
+    ExtractionPatterns.FIELD_PATTERNS,
+    ExtractionPatterns.FLAGS,
+    ExtractionPatterns.WEAK_PATTERNS,
+    Settings.PATTERN_TIMEOUT,
+    ExtractionPatterns.PATTERN_RUN_STARTS,
+)
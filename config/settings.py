@@ -11,6 +11,45 @@ class Settings:
     TESSERACT_PATH = os.getenv("TESSERACT_PATH", r"C:\Program Files\Tesseract-OCR\tesseract.exe")
     MAX_PAGES = int(os.getenv("MAX_PAGES", "3"))
     RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "True").lower() == "true"
+    CACHE_PATH = os.getenv("CACHE_PATH", "data/cache/extraction_cache.db")
+    CACHE_MAX_MB = int(os.getenv("CACHE_MAX_MB", "256"))
+    STREAMING_EXTRACTION = os.getenv("STREAMING_EXTRACTION", "False").lower() == "true"
+    MAX_PAGES_HARD = int(os.getenv("MAX_PAGES_HARD", "10"))
+    MIN_PAGE_TEXT_CHARS = int(os.getenv("MIN_PAGE_TEXT_CHARS", "100"))
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))  # 0 = número de CPUs
+    OCR_MEMORY_BUDGET_MB = int(os.getenv("OCR_MEMORY_BUDGET_MB", "1024"))
+    OCR_CACHE_ENABLED = os.getenv("OCR_CACHE_ENABLED", "True").lower() == "true"
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0"))  # 0 = número de CPUs
+    WATCH_POLL_INTERVAL = int(os.getenv("WATCH_POLL_INTERVAL", "10"))
+    WATCH_SETTLE_SECONDS = float(os.getenv("WATCH_SETTLE_SECONDS", "2"))
+    WATCH_WORKERS = int(os.getenv("WATCH_WORKERS", "2"))
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    SHEETS_SINK = os.getenv("SHEETS_SINK", "cells").lower()  # "cells" (células fixas) ou "rows" (uma linha por edital)
+    SHEETS_ROWS_RANGE = os.getenv("SHEETS_ROWS_RANGE", "A1")
+    SHEETS_FLUSH_ROWS = int(os.getenv("SHEETS_FLUSH_ROWS", "50"))
+    SHEETS_FLUSH_SECONDS = float(os.getenv("SHEETS_FLUSH_SECONDS", "30"))
+    SHEETS_CLIENT_TTL = int(os.getenv("SHEETS_CLIENT_TTL", "3000"))
+    SHEETS_TOKEN_REFRESH_MARGIN = int(os.getenv("SHEETS_TOKEN_REFRESH_MARGIN", "300"))
+    SHEETS_REQUESTS_PER_MINUTE = int(os.getenv("SHEETS_REQUESTS_PER_MINUTE", "60"))  # cota de escrita por usuário
+    SHEETS_BURST = int(os.getenv("SHEETS_BURST", "5"))  # requisições em rajada, descontadas da reposição
+    SHEETS_BACKOFF_BASE = float(os.getenv("SHEETS_BACKOFF_BASE", "1"))
+    SHEETS_BACKOFF_MAX = float(os.getenv("SHEETS_BACKOFF_MAX", "32"))
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+    USER_SETTINGS_TTL = int(os.getenv("USER_SETTINGS_TTL", "60"))  # 0 desativa o cache
+    KDF_CACHE_SIZE = int(os.getenv("KDF_CACHE_SIZE", "32"))  # 0 desativa o cache de chaves derivadas
+    KDF_CACHE_TTL = int(os.getenv("KDF_CACHE_TTL", "900"))  # 0 = sem expiração
+    UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "2"))
+    UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "data/uploads")  # PDFs enviados aguardando processamento
+    TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "")  # JSON lines com um span por etapa; vazio desativa
+    METRICS_FILE = os.getenv("METRICS_FILE", "")  # arquivo no formato do Prometheus; vazio desativa
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # endpoint HTTP /metrics; 0 desativa
+    PROFILE_MODE = os.getenv("PROFILE_MODE", "").lower()  # "cprofile" ou "sampler" por documento; vazio desativa
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+    PROFILE_TOP = int(os.getenv("PROFILE_TOP", "25"))
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+    PATTERN_TIMEOUT = float(os.getenv("PATTERN_TIMEOUT", "5"))  # s por padrão e documento; 0 = sem limite
     CELL_MAPPING = {
     "Orgão": "E2",
     "Edital de Licitação": "E3",
@@ -1,10 +1,21 @@
 import os
 import json
+import time
+import threading
 from dotenv import load_dotenv
+from config.settings import Settings
 from database.init_db import DatabaseManager
 from security.encryption import EncryptionManager
+from utils.metrics import METRICS
 
 class UserSettings:
+    # Configurações decodificadas por usuário (só em memória; as credenciais nunca vão para o disco em claro)
+    _cache = {}  # user_id -> (configurações, carregado em)
+    _cache_lock = threading.Lock()
+    _cache_hits = 0
+    _cache_misses = 0
+    _cache_generation = 0  # muda a cada invalidação: uma leitura em andamento não repõe dados antigos
+    
     def __init__(self, user_id=None, username=None):
         self.user_id = user_id
         self.username = username
@@ -13,10 +24,50 @@ class UserSettings:
         self.settings = self._load_user_settings()
     
     def _load_user_settings(self):
-        """Carrega as configurações específicas do usuário"""
+        """Carrega as configurações do usuário, reaproveitando o cache enquanto o TTL não expirar"""
         if not self.user_id:
             return self._load_default_settings()
         
+        cls = type(self)
+        ttl = Settings().USER_SETTINGS_TTL
+        with cls._cache_lock:
+            entry = cls._cache.get(self.user_id)
+            hit = bool(entry) and time.monotonic() - entry[1] < ttl
+            if hit:
+                cls._cache_hits += 1
+            else:
+                cls._cache_misses += 1
+            generation = cls._cache_generation
+        # Os mesmos acertos/falhas de cache_stats(), exportados no /metrics
+        METRICS.increment("cache_configuracoes", resultado="acerto" if hit else "falha")
+        if hit:
+            return entry[0]
+        
+        settings = self._read_user_settings()
+        if ttl > 0:
+            with cls._cache_lock:
+                if generation == cls._cache_generation:
+                    cls._cache[self.user_id] = (settings, time.monotonic())
+        return settings
+    
+    @classmethod
+    def invalidate(cls, user_id=None):
+        """Descarta as configurações em cache de um usuário (ou de todos)"""
+        with cls._cache_lock:
+            cls._cache_generation += 1
+            if user_id is None:
+                cls._cache.clear()
+            else:
+                cls._cache.pop(user_id, None)
+    
+    @classmethod
+    def cache_stats(cls):
+        """Acertos e falhas do cache de configurações (para conferir o efeito com vários usuários)"""
+        with cls._cache_lock:
+            return {'hits': cls._cache_hits, 'misses': cls._cache_misses, 'users': len(cls._cache)}
+    
+    def _read_user_settings(self):
+        """Lê do banco as configurações específicas do usuário"""
         # Carrega configurações da planilha
         sheet_config = self.db_manager.get_spreadsheet_config(self.user_id)
         
@@ -92,6 +143,7 @@ class UserSettings:
         
         self.db_manager.save_spreadsheet_config(self.user_id, spreadsheet_id, spreadsheet_name)
         # Recarrega as configurações
+        self.invalidate(self.user_id)
         self.settings = self._load_user_settings()
     
     def save_google_credentials(self, credentials_json):
@@ -101,6 +153,7 @@ class UserSettings:
         
         self.db_manager.save_google_credentials(self.user_id, credentials_json)
         # Recarrega as configurações
+        self.invalidate(self.user_id)
         self.settings = self._load_user_settings()
     
     def __getattr__(self, name):
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import logging
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Código de que dependem os campos extraídos: padrões, pós-processamento, palavras-chave e fallbacks
+EXTRACTION_SOURCES = (
+    os.path.join("config", "patterns.py"),
+    os.path.join("core", "keyword_index.py"),
+    os.path.join("core", "pdf_processor.py"),
+)
+
+def _source_fingerprint():
+    """Hash do código de extração: qualquer alteração nele invalida os campos em cache"""
+    digest = hashlib.sha256()
+    for relative_path in EXTRACTION_SOURCES:
+        with open(os.path.join(ROOT, relative_path), 'rb') as f:
+            # Mesmo hash com fim de linha LF ou CRLF
+            digest.update(f.read().replace(b'\r\n', b'\n'))
+    return digest.hexdigest()[:16]
+
+EXTRACTION_VERSION = _source_fingerprint()
+
+class ExtractionCache:
+    """Cache persistente dos resultados de extração, endereçado pelo SHA-256 do PDF
+
+    Uma instância por arquivo no processo, com uma única conexão reaproveitada.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __new__(cls, cache_path=None, max_bytes=None):
+        cache_path = os.path.abspath(cache_path or Settings().CACHE_PATH)
+        with cls._instances_lock:
+            instance = cls._instances.get(cache_path)
+            if instance is None:
+                instance = super().__new__(cls)
+                instance._initialized = False
+                cls._instances[cache_path] = instance
+        return instance
+
+    def __init__(self, cache_path=None, max_bytes=None):
+        with self._instances_lock:
+            if self._initialized:
+                return
+            self.settings = Settings()
+            self.cache_path = os.path.abspath(cache_path or self.settings.CACHE_PATH)
+            self.max_bytes = max_bytes if max_bytes is not None else self.settings.CACHE_MAX_MB * 1024 * 1024
+            self._lock = threading.Lock()
+            self._conn = None
+            self._conn_pid = None
+            self._init_database()
+            self._initialized = True
+
+    def _connection(self):
+        """Conexão do processo (chamar com _lock); processos do pool criados por fork abrem a sua"""
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.cache_path, timeout=30, check_same_thread=False)
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def _init_database(self):
+        """Cria a tabela do cache se não existir"""
+        directory = os.path.dirname(self.cache_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS extraction_cache (
+            cache_key TEXT PRIMARY KEY,
+            file_hash TEXT NOT NULL,
+            raw_text TEXT NOT NULL,
+            normalized_text TEXT,
+            fields TEXT,
+            size_bytes INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_extraction_cache_access ON extraction_cache (last_access)')
+        conn.commit()
+
+    @staticmethod
+    def hash_file(pdf_path, chunk_size=1024 * 1024):
+        """Calcula o SHA-256 do conteúdo do PDF"""
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_bytes(data):
+        """Calcula o SHA-256 de um PDF já carregado em memória"""
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def build_key(file_hash, max_pages, use_ocr, mode="full", min_page_text_chars=None):
+        """Monta a chave do cache a partir do hash do PDF, das configurações e do código de extração"""
+        if min_page_text_chars is None:
+            min_page_text_chars = Settings.MIN_PAGE_TEXT_CHARS
+        raw_key = f"{file_hash}|{max_pages}|{int(bool(use_ocr))}|{min_page_text_chars}|{EXTRACTION_VERSION}"
+        if mode != "full":
+            raw_key += f"|{mode}"
+        return hashlib.sha256(raw_key.encode()).hexdigest()
+
+    @staticmethod
+    def build_ocr_key(file_hash, page_number):
+        """Chave do texto de OCR de uma página do PDF (independe dos padrões de extração)"""
+        return hashlib.sha256(f"ocr|{file_hash}|{page_number}".encode()).hexdigest()
+
+    def get_ocr_text(self, file_hash, page_number):
+        """Obtém o texto de OCR de uma página em cache (ou None)"""
+        entry = self.get(self.build_ocr_key(file_hash, page_number))
+        return entry['raw_text'] if entry else None
+
+    def put_ocr_text(self, file_hash, page_number, ocr_text):
+        """Grava o texto de OCR de uma página no cache, sujeito à mesma evicção LRU"""
+        return self.put(self.build_ocr_key(file_hash, page_number), file_hash, ocr_text)
+
+    def get(self, cache_key):
+        """Obtém uma entrada do cache (ou None) e atualiza o último acesso"""
+        try:
+            with self._lock:
+                conn = self._connection()
+                cursor = conn.cursor()
+                cursor.execute(
+                    'SELECT raw_text, normalized_text, fields FROM extraction_cache WHERE cache_key = ?',
+                    (cache_key,)
+                )
+                result = cursor.fetchone()
+                if result:
+                    cursor.execute(
+                        'UPDATE extraction_cache SET last_access = ? WHERE cache_key = ?',
+                        (time.time(), cache_key)
+                    )
+                    conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao ler cache de extração: {str(e)}")
+            self._rollback()
+            return None
+
+        if not result:
+            return None
+
+        return {
+            'raw_text': result[0],
+            'normalized_text': result[1],
+            'fields': json.loads(result[2]) if result[2] is not None else None,
+        }
+
+    def put(self, cache_key, file_hash, raw_text, normalized_text=None, fields=None):
+        """Grava (ou substitui) uma entrada no cache e aplica a evicção LRU por tamanho"""
+        fields_json = json.dumps(fields, ensure_ascii=False) if fields is not None else None
+        size_bytes = len(raw_text.encode()) + len((normalized_text or "").encode()) + len((fields_json or "").encode())
+        if size_bytes > self.max_bytes:
+            return False
+
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connection()
+                cursor = conn.cursor()
+                cursor.execute('''
+                INSERT OR REPLACE INTO extraction_cache
+                    (cache_key, file_hash, raw_text, normalized_text, fields, size_bytes, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (cache_key, file_hash, raw_text, normalized_text, fields_json, size_bytes, now, now))
+                self._evict(cursor)
+                conn.commit()
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao gravar cache de extração: {str(e)}")
+            self._rollback()
+            return False
+
+    def _rollback(self):
+        """Descarta a transação que falhou para não travar a conexão reaproveitada"""
+        with self._lock:
+            try:
+                self._connection().rollback()
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, cursor):
+        """Remove as entradas menos usadas até o cache caber em max_bytes"""
+        cursor.execute('SELECT COALESCE(SUM(size_bytes), 0) FROM extraction_cache')
+        total = cursor.fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        cursor.execute('SELECT cache_key, size_bytes FROM extraction_cache ORDER BY last_access ASC')
+        expired = []
+        for cache_key, size_bytes in cursor.fetchall():
+            if total <= self.max_bytes:
+                break
+            expired.append((cache_key,))
+            total -= size_bytes
+
+        cursor.executemany('DELETE FROM extraction_cache WHERE cache_key = ?', expired)
+        logger.info(f"🧹 Cache de extração: {len(expired)} entradas removidas (LRU)")
+
+    def clear(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM extraction_cache')
+            conn.commit()
@@ -0,0 +1,74 @@
+import re
+from bisect import bisect_left, bisect_right
+from config.patterns import ExtractionPatterns
+
+# Delimitadores que fecham o valor à direita e à esquerda da palavra-chave
+RIGHT_DELIMITERS = re.compile(r"[\n .;:)}\]\-–—]")
+LEFT_DELIMITERS = re.compile(r"[\n .;:({\[\-–—]")
+
+class KeywordIndex:
+    """Índice de palavras-chave de um documento, construído uma vez e usado pelo texto e pelo OCR"""
+
+    def __init__(self, text, field_keywords=None):
+        self.text = text
+        self.field_keywords = field_keywords or ExtractionPatterns.FIELD_KEYWORDS
+        self._right_delimiters = [m.start() for m in RIGHT_DELIMITERS.finditer(text)]
+        self._left_delimiters = [m.start() for m in LEFT_DELIMITERS.finditer(text)]
+
+        keywords = {keyword for keywords in self.field_keywords.values() for keyword in keywords}
+        self.positions = self._index_keywords(text, keywords)
+
+    @staticmethod
+    def _is_word_char(char):
+        return char.isalnum() or char == "_"
+
+    @classmethod
+    def _index_keywords(cls, text, keywords):
+        """Mapeia cada palavra-chave para as posições onde ocorre como palavra inteira (sem diferenciar caixa)"""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Alguns caracteres mudam de tamanho ao trocar de caixa: usa regex para manter as posições
+            return {
+                keyword: [m.start() for m in re.finditer(rf"\b{re.escape(keyword)}\b", text, re.IGNORECASE)]
+                for keyword in keywords
+            }
+
+        positions = {}
+        for keyword in keywords:
+            needle = keyword.lower()
+            found = []
+            start = lowered.find(needle)
+            while start != -1:
+                end = start + len(needle)
+                if (start == 0 or not cls._is_word_char(text[start - 1])) and \
+                        (end == len(text) or not cls._is_word_char(text[end])):
+                    found.append(start)
+                start = lowered.find(needle, start + 1)
+            positions[keyword] = found
+        return positions
+
+    def window(self, start, length):
+        """Recorta o valor em volta de uma ocorrência usando as posições de delimitadores pré-calculadas"""
+        end = start + length
+
+        # Busca para a direita (até 200 caracteres)
+        i = bisect_left(self._right_delimiters, start)
+        if i < len(self._right_delimiters) and self._right_delimiters[i] < min(start + 200, len(self.text)):
+            end = self._right_delimiters[i]
+
+        # Busca para a esquerda (até 100 caracteres)
+        i = bisect_right(self._left_delimiters, start - 1) - 1
+        if i >= 0 and self._left_delimiters[i] > max(0, start - 100):
+            start = self._left_delimiters[i]
+
+        return self.text[start:end].strip()
+
+    def extract_field(self, field_name):
+        """Tenta extrair um campo pela primeira ocorrência de cada uma das suas palavras-chave"""
+        for keyword in self.field_keywords.get(field_name, []):
+            positions = self.positions.get(keyword)
+            if positions:
+                value = self.window(positions[0], len(keyword))
+                if len(value) > 2:
+                    return value
+        return "NÃO ENCONTRADO"
@@ -1,43 +1,220 @@
+import io
 import os
 import re
-import pdfplumber
-from PyPDF2 import PdfReader
+import string
+import tempfile
 from config.settings import Settings
-from config.patterns import ExtractionPatterns
+from config.patterns import PATTERN_REGISTRY, aborted_patterns
 from utils.ocr_handler import OCRHandler
+from core.extraction_cache import ExtractionCache
+from core.keyword_index import KeywordIndex
+from utils.metrics import METRICS
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Hífens longos viram "-" e caracteres de controle são removidos
+NORMALIZE_CHARS = {"–": "-", "—": "-", **{chr(code): "" for code in range(0x20)}}
+# Dígito colado em letra (antes ou depois) e os caracteres da tabela; começar por \d/classe
+# deixa o re pular direto para os candidatos, e a função só roda nos poucos casamentos
+NORMALIZE_PATTERN = re.compile(r"\d(?:(?=[A-Za-z])|(?<=[A-Za-z].))|[\x00-\x1f–—]")
+ASCII_LETTERS = frozenset(string.ascii_letters)
+
+def _normalize_match(match):
+    """Substituição de um casamento de NORMALIZE_PATTERN"""
+    char = match.group()
+    mapped = NORMALIZE_CHARS.get(char)
+    if mapped is not None:
+        return mapped
+    text, start, end = match.string, match.start(), match.end()
+    before = " " if start and text[start - 1] in ASCII_LETTERS else ""
+    after = " " if end < len(text) and text[end] in ASCII_LETTERS else ""
+    return before + char + after
+
 class PDFProcessor:
-    def __init__(self, pdf_path):
-        self.pdf_path = pdf_path
+    def __init__(self, source, filename=None):
+        # `source` pode ser o caminho do PDF, os bytes ou um arquivo aberto (ex.: upload do Streamlit)
+        if isinstance(source, (str, os.PathLike)):
+            self.pdf_path = os.fspath(source)
+            self._data = None
+        else:
+            self.pdf_path = None
+            self._data = bytes(source) if isinstance(source, (bytes, bytearray, memoryview)) else source.read()
+        self.filename = filename or os.path.basename(self.pdf_path or "documento.pdf")
         self.settings = Settings()
         self.text = ""
         self.extracted_data = {}
+        self.patterns = PATTERN_REGISTRY
+        self.cache = ExtractionCache() if self.settings.CACHE_ENABLED else None
+        self._file_hash = None
+        self._cache_key = None
+        self._cached_entry = None
+        self._page_count = None
+        self._page_has_text = {}  # página -> camada de texto utilizável (não precisa de OCR)
+        self._ocr_page_texts = {}
+        self._ocr_failed_pages = set()  # páginas cujo OCR falhou ou voltou vazio neste documento
+        self._ocr_text = None
+        self._spool_path = None  # cópia em disco de um upload em memória, usada só pelo OCR
+        self._keyword_indexes = []
+        self._aborts_at_start = aborted_patterns()
+        self._incomplete_logged = False
+    
+    def _get_data(self):
+        """Conteúdo do PDF, lido do disco uma única vez e compartilhado por todos os motores"""
+        if self._data is None:
+            with open(self.pdf_path, 'rb') as f:
+                self._data = f.read()
+        return self._data
+    
+    def _open_buffer(self):
+        """Novo cursor sobre o mesmo buffer em memória (pdfplumber e PyPDF2 não copiam os bytes)"""
+        return io.BytesIO(self._get_data())
+    
+    def _ocr_source(self):
+        """Caminho lido pelo poppler: o próprio arquivo ou, para upload em memória, um único
+        arquivo temporário por documento (os *_from_bytes do pdf2image gravam um a cada chamada)"""
+        if self.pdf_path:
+            return self.pdf_path
+        if self._spool_path is None:
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
+                f.write(self._get_data())
+            self._spool_path = f.name
+        return self._spool_path
+    
+    def close(self):
+        """Remove o arquivo temporário do OCR, se houver"""
+        if self._spool_path is not None:
+            try:
+                os.remove(self._spool_path)
+            except OSError:
+                pass
+            self._spool_path = None
+    
+    def __del__(self):
+        if getattr(self, "_spool_path", None) is not None:
+            self.close()
+    
+    def _get_file_hash(self):
+        """Calcula (uma única vez) o SHA-256 do PDF"""
+        if self._file_hash is None:
+            self._file_hash = ExtractionCache.hash_bytes(self._get_data())
+        return self._file_hash
+    
+    def _get_cache_key(self):
+        """Calcula (uma única vez) a chave do cache para este PDF"""
+        if self._cache_key is None:
+            mode = f"streaming-{self.settings.MAX_PAGES_HARD}" if self.settings.STREAMING_EXTRACTION else "full"
+            self._cache_key = ExtractionCache.build_key(
+                self._get_file_hash(), self.settings.MAX_PAGES, self.settings.USE_OCR, mode,
+                self.settings.MIN_PAGE_TEXT_CHARS
+            )
+        return self._cache_key
+    
+    def _ocr_pages(self, page_numbers):
+        """Executa o OCR no máximo uma vez por página (memória + cache em disco opcional)"""
+        missing = [n for n in page_numbers if n not in self._ocr_page_texts]
+        
+        use_disk_cache = self.cache is not None and self.settings.OCR_CACHE_ENABLED
+        if missing and use_disk_cache:
+            for page_number in missing:
+                cached = self.cache.get_ocr_text(self._get_file_hash(), page_number)
+                if cached is not None:
+                    self._ocr_page_texts[page_number] = cached
+            missing = [n for n in missing if n not in self._ocr_page_texts]
+        
+        if missing:
+            with METRICS.span("ocr", self.filename, paginas=len(missing)):
+                results = OCRHandler.process_pages(self._ocr_source(), missing)
+            for page_number in missing:
+                text = results.get(page_number, "")
+                self._ocr_page_texts[page_number] = text
+                if not text.strip():
+                    self._ocr_failed_pages.add(page_number)
+                elif use_disk_cache:
+                    self.cache.put_ocr_text(self._get_file_hash(), page_number, text)
+        
+        return [self._ocr_page_texts[n] for n in page_numbers]
+    
+    def _record_text_layer(self, page_number, page_text):
+        self._page_has_text[page_number] = len(page_text.strip()) >= self.settings.MIN_PAGE_TEXT_CHARS
+    
+    def _check_text_layers(self, page_numbers):
+        """Confere no pdfplumber as páginas ainda não lidas (texto veio do cache, streaming parou antes)"""
+        unknown = [n for n in page_numbers if n not in self._page_has_text]
+        if not unknown:
+            return
+        try:
+            import pdfplumber
+            with pdfplumber.open(self._open_buffer()) as pdf:
+                self._page_count = len(pdf.pages)
+                for page_number in unknown:
+                    if page_number <= len(pdf.pages):
+                        self._record_text_layer(page_number, pdf.pages[page_number - 1].extract_text() or "")
+        except Exception as e:
+            logger.error(f"Erro ao verificar a camada de texto: {str(e)}")
+    
+    def _get_ocr_text(self):
+        """Texto de OCR das primeiras MAX_PAGES páginas sem camada de texto, reaproveitando as já processadas
+        
+        Páginas com texto utilizável não vão para o OCR: a leitura delas já está no texto do documento.
+        """
+        self._check_text_layers(range(1, self.settings.MAX_PAGES + 1))
+        if self._page_count is None:
+            self._page_count = OCRHandler.page_count(self._ocr_source())
+        
+        page_numbers = [
+            n for n in range(1, min(self._page_count, self.settings.MAX_PAGES) + 1)
+            if not self._page_has_text.get(n, False)
+        ]
+        return "".join(text + "\n" for text in self._ocr_pages(page_numbers))
     
     def extract_text(self):
         """Extrae texto do PDF usando múltiplos métodos (PDF, OCR)"""
         try:
+            # Documento já processado com as mesmas configurações: usa o cache
+            if self.cache:
+                self._cached_entry = self.cache.get(self._get_cache_key())
+                if self._cached_entry:
+                    logger.info(f"⚡ Cache de extração encontrado: {self.filename}")
+                    self.text = self._cached_entry['raw_text']
+                    return self.text
+            
             # Primeiro, tente extrair texto normal (PDF)
-            with pdfplumber.open(self.pdf_path) as pdf:
+            import pdfplumber
+            with METRICS.span("pdfplumber", self.filename), pdfplumber.open(self._open_buffer()) as pdf:
+                self._page_count = len(pdf.pages)
                 pages = min(len(pdf.pages), self.settings.MAX_PAGES)
-                for i in range(pages):
-                    page = pdf.pages[i]
-                    self.text += page.extract_text() + "\n"
+                page_texts = [pdf.pages[i].extract_text() or "" for i in range(pages)]
+            METRICS.increment("paginas_lidas", pages)
+            for page_number, page_text in enumerate(page_texts, 1):
+                self._record_text_layer(page_number, page_text)
             
-            # Verifica se o texto é suficiente
-            if len(self.text.strip()) < 100:
-                # Se não tiver texto suficiente, use OCR
-                self.text = OCRHandler.process_pdf(self.pdf_path, self.settings.MAX_PAGES)
+            # Verifica se o texto é suficiente; com OCR ativo, páginas escaneadas
+            # (ex.: capa) são processadas mesmo que o restante tenha texto
+            if self.settings.USE_OCR or len("".join(page_texts).strip()) < 100:
+                scanned_pages = [
+                    i + 1 for i, page_text in enumerate(page_texts)
+                    if len(page_text.strip()) < self.settings.MIN_PAGE_TEXT_CHARS
+                ]
+                # Só as páginas sem camada de texto utilizável vão para o OCR
+                for page_number, ocr_text in zip(scanned_pages, self._ocr_pages(scanned_pages)):
+                    if len(ocr_text.strip()) > len(page_texts[page_number - 1].strip()):
+                        page_texts[page_number - 1] = ocr_text
+            
+            self.text += "".join(page_text + "\n" for page_text in page_texts)
             
             # Se ainda não tiver texto, tente com PyPDF2
             if len(self.text.strip()) < 100:
-                reader = PdfReader(self.pdf_path)
-                pages = min(len(reader.pages), self.settings.MAX_PAGES)
-                for i in range(pages):
-                    page = reader.pages[i]
-                    self.text += page.extract_text() + "\n"
+                from PyPDF2 import PdfReader
+                with METRICS.span("pypdf2", self.filename):
+                    reader = PdfReader(self._open_buffer())
+                    pages = min(len(reader.pages), self.settings.MAX_PAGES)
+                    for i in range(pages):
+                        page = reader.pages[i]
+                        self.text += page.extract_text() + "\n"
+            
+            if self.cache and self.text.strip() and self._extraction_complete():
+                self.cache.put(self._get_cache_key(), self._file_hash, self.text)
             
             return self.text
         
@@ -47,91 +224,161 @@ class PDFProcessor:
     
     def _normalize_text(self, text):
         """Normaliza o texto para facilitar a extração"""
-        # Remove quebras quebradas
-        text = text.replace("\n", " ")
-        # Remove múltiplos espaços
-        text = re.sub(r"\s+", " ", text)
-        # Separa letras coladas em números
-        text = re.sub(r"([A-Za-z])(\d)", r"\1 \2", text)
-        # Separa números coladas em letras
-        text = re.sub(r"(\d)([A-Za-z])", r"\1 \2", text)
-        # Normaliza hífens
-        text = re.sub(r"[–—]", "-", text)
-        # Remove caracteres especiais
-        text = re.sub(r"[\x00-\x1f]", "", text)
-        return text.strip()
+        # split() junta quebras de linha e espaços (mesmo conjunto do \s); uma única varredura do re
+        # separa letras coladas em números, normaliza hífens e remove caracteres de controle
+        return NORMALIZE_PATTERN.sub(_normalize_match, " ".join(text.split())).strip()
+    
+    def iter_pages(self, max_pages=None):
+        """Gera o texto das páginas uma a uma (com OCR só nas páginas sem texto, se ativo)"""
+        max_pages = max_pages or self.settings.MAX_PAGES_HARD
+        import pdfplumber
+        with pdfplumber.open(self._open_buffer()) as pdf:
+            self._page_count = len(pdf.pages)
+            for i in range(min(len(pdf.pages), max_pages)):
+                page_text = pdf.pages[i].extract_text() or ""
+                METRICS.increment("paginas_lidas")
+                self._record_text_layer(i + 1, page_text)
+                if self.settings.USE_OCR and len(page_text.strip()) < self.settings.MIN_PAGE_TEXT_CHARS:
+                    ocr_text = self._ocr_pages([i + 1])[0]
+                    if len(ocr_text.strip()) > len(page_text.strip()):
+                        page_text = ocr_text
+                yield page_text
+    
+    def _apply_fallbacks(self, field):
+        """Palavras-chave e, se ativo, OCR para um campo não encontrado pelas regex"""
+        value = self._extract_by_keywords(field, self.text)
+        if value == "NÃO ENCONTRADO" and self.settings.USE_OCR:
+            value = self._extract_with_ocr(field)
+        return value
+    
+    def extract_all_fields_streaming(self):
+        """Extrai página a página e para assim que todos os campos tiverem valor confiável"""
+        fields = [field for field in self.settings.CELL_MAPPING.keys() if field != "Edital de Licitação"]
+        
+        if self.cache:
+            self._cached_entry = self.cache.get(self._get_cache_key())
+            if self._cached_entry and self._cached_entry['fields'] is not None:
+                logger.info(f"⚡ Cache de extração encontrado: {self.filename}")
+                self.text = self._cached_entry['normalized_text']
+                self.extracted_data = dict(self._cached_entry['fields'])
+                return self.extracted_data
+        
+        page_texts = []
+        confident = set()
+        try:
+            for page_number, page_text in enumerate(self.iter_pages(), 1):
+                page_texts.append(page_text)
+                normalized = self._normalize_text("".join(text + "\n" for text in page_texts))
+                
+                for field in fields:
+                    if field in confident:
+                        continue
+                    compiled, value = self.patterns.match_field(field, normalized)
+                    self.extracted_data[field] = value
+                    if compiled is not None and not compiled.weak:
+                        confident.add(field)
+                
+                if len(confident) == len(fields):
+                    break
+                # Depois de MAX_PAGES só continua enquanto houver campo sem nenhum valor
+                if page_number >= self.settings.MAX_PAGES and "NÃO ENCONTRADO" not in self.extracted_data.values():
+                    break
+        except Exception as e:
+            logger.error(f"Erro na extração de texto: {str(e)}")
+        
+        raw_text = "".join(text + "\n" for text in page_texts)
+        logger.info(f"📄 {len(page_texts)} página(s) lidas, {len(confident)}/{len(fields)} campos confiáveis")
+        
+        # Documento sem texto (escaneado, OCR desativado): usa o fluxo completo
+        if len(raw_text.strip()) < 100:
+            self.text = ""
+            self._cached_entry = None
+            return self._extract_all_fields_full()
+        
+        self.text = self._normalize_text(raw_text)
+        with METRICS.span("fallback", self.filename):
+            for field in fields:
+                if self.extracted_data.get(field, "NÃO ENCONTRADO") == "NÃO ENCONTRADO":
+                    self.extracted_data[field] = self._apply_fallbacks(field)
+        
+        if self.cache and self._extraction_complete():
+            self.cache.put(self._get_cache_key(), self._get_file_hash(), raw_text, self.text, self.extracted_data)
+        
+        return self.extracted_data
     
     def extract_all_fields(self):
         """Extrai todos os campos do edital com fallback inteligente"""
         self.extracted_data = {}
+        try:
+            if self.settings.STREAMING_EXTRACTION and not self.text:
+                data = self.extract_all_fields_streaming()
+            else:
+                data = self._extract_all_fields_full()
+        finally:
+            self.close()
+        
+        not_found = sum(1 for value in data.values() if value == "NÃO ENCONTRADO")
+        if not_found:
+            METRICS.increment("campos_nao_encontrados", not_found)
+        return data
+    
+    def _extract_all_fields_full(self):
+        """Extrai os campos a partir do texto das primeiras MAX_PAGES páginas"""
+        if not self.text:
+            self.extract_text()
+        
+        # Campos já extraídos anteriormente para este mesmo PDF
+        if self._cached_entry and self._cached_entry['fields'] is not None:
+            self.text = self._cached_entry['normalized_text']
+            self.extracted_data = dict(self._cached_entry['fields'])
+            return self.extracted_data
+        
+        raw_text = self.text
         self.text = self._normalize_text(self.text)
         
         # Primeiro, tente extrair com padrões regex
-        for field in self.settings.CELL_MAPPING.keys():
-            if field in ["Edital de Licitação"]:
-                continue
-            
-            # Tenta extrair com padrões regex
-            self.extracted_data[field] = ExtractionPatterns.extract_field(field, self.text)
-            
-            # Se ainda não for encontrado, tente outros métodos
-            if self.extracted_data[field] == "NÃO ENCONTRADO":
-                # Tenta extrair com base em palavras-chave
-                self.extracted_data[field] = self._extract_by_keywords(field, self.text)
-                
-                # Se ainda não for encontrado, tente com OCR (se não tiver sido usado)
-                if self.extracted_data[field] == "NÃO ENCONTRADO" and self.settings.USE_OCR:
-                    self.extracted_data[field] = self._extract_with_ocr(field)
+        with METRICS.span("regex", self.filename):
+            for field in self.settings.CELL_MAPPING.keys():
+                if field in ["Edital de Licitação"]:
+                    continue
+                self.extracted_data[field] = self.patterns.extract_field(field, self.text)
+        
+        # Se ainda não for encontrado, tente palavras-chave e OCR
+        with METRICS.span("fallback", self.filename):
+            for field, value in self.extracted_data.items():
+                if value == "NÃO ENCONTRADO":
+                    self.extracted_data[field] = self._apply_fallbacks(field)
+        
+        if self.cache and raw_text.strip() and self._extraction_complete():
+            self.cache.put(self._get_cache_key(), self._file_hash, raw_text, self.text, self.extracted_data)
         
         return self.extracted_data
     
+    def _extraction_complete(self):
+        """False se algum padrão foi abortado ou alguma página falhou no OCR neste documento:
+        o resultado parcial não vai para o cache"""
+        aborted = aborted_patterns() - self._aborts_at_start
+        if (aborted or self._ocr_failed_pages) and not self._incomplete_logged:
+            self._incomplete_logged = True
+            if aborted:
+                logger.warning(f"⏱️ {aborted} padrão(ões) abortado(s) em {self.filename}: resultado não será guardado no cache")
+            if self._ocr_failed_pages:
+                pages = ", ".join(str(n) for n in sorted(self._ocr_failed_pages))
+                logger.warning(f"⚠️ OCR falhou na(s) página(s) {pages} de {self.filename}: resultado não será guardado no cache")
+        return not aborted and not self._ocr_failed_pages
+    
+    def _get_keyword_index(self, text):
+        """Índice de palavras-chave do texto, construído uma única vez por texto do documento"""
+        for index in self._keyword_indexes:
+            if index.text is text:
+                return index
+        index = KeywordIndex(text)
+        self._keyword_indexes.append(index)
+        return index
+    
     def _extract_by_keywords(self, field_name, text):
         """Tenta extrair com base em palavras-chave"""
-        keywords = {
-            "Orgão": ["órgão", "entidade", "prefeitura", "secretaria", "governo"],
-            "CNPJ Órgão": ["cnpj", "inscrição", "código"],
-            "Cidade e Estado": ["município", "cidade", "estado", "uf", "localização"],
-            "Nº Pregão e Processo": ["pregão", "processo", "número", "nº"],
-            "Telefones": ["telefone", "fones", "contato", "lado", "fale conosco"],
-            "E-mail": ["e-mail", "email", "contato", "fale conosco"],
-            "Prazo de pagamento": ["prazo", "pagamento", "vencimento", "pago"],
-            "Plataforma": ["plataforma", "sistema", "ferramenta", "sistema de licitação"],
-            "UASG": ["uasg", "código uasg", "código uasg"],
-            "Modalidade de compra": ["modalidade", "tipo", "licitação", "compra"],
-            "Prazo de entrega": ["prazo", "entrega", "entregas", "recepção"],
-            "Local de entrega": ["local", "entrega", "recepção", "fornecimento"],
-            "Validade da proposta": ["validade", "proposta", "válido", "prazo"],
-            "Catálogo técnico": ["catálogo", "técnic", "especificação", "ficha"],
-            "Modo de Disputa": ["modo", "disputa", "aberto", "fechado"]
-        }
-        
-        # Para cada palavra-chave, tente encontrar o texto
-        for keyword in keywords.get(field_name, []):
-            pattern = re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE)
-            matches = pattern.findall(text)
-            
-            if matches:
-                # Encontrou a palavra-chave, tente extrair o valor
-                start_idx = text.find(matches[0])
-                end_idx = start_idx + len(matches[0])
-                
-                # Busca para a direita
-                for i in range(start_idx, min(start_idx + 200, len(text))):
-                    if text[i] in ['\n', ' ', '.', ';', ':', ')', '}', ']', '-', '–', '—', '–']:
-                        end_idx = i
-                        break
-                
-                # Busca para a esquerda
-                for i in range(start_idx - 1, max(0, start_idx - 100), -1):
-                    if text[i] in ['\n', ' ', '.', ';', ':', '(', '{', '[', '-', '–', '—', '–']:
-                        start_idx = i
-                        break
-                
-                value = text[start_idx:end_idx].strip()
-                if len(value) > 2:
-                    return value
-        
-        return "NÃO ENCONTRADO"
+        return self._get_keyword_index(text).extract_field(field_name)
     
     def _extract_with_ocr(self, field_name):
         """Tenta extrair usando OCR (Tesseract) para PDFs escaneados"""
@@ -139,64 +386,22 @@ class PDFProcessor:
             return "NÃO ENCONTRADO"
         
         # Use a lógica de OCR para extrair
-        ocr_text = OCRHandler.process_pdf(self.pdf_path, self.settings.MAX_PAGES)
+        if self._ocr_text is None:
+            self._ocr_text = self._get_ocr_text()
         
         # Tente extrair com o texto do OCR
-        extracted = ExtractionPatterns.extract_field(field_name, ocr_text)
+        extracted = self.patterns.extract_field(field_name, self._ocr_text)
         
         # Se ainda não for encontrado, tente com palavras-chave
         if extracted == "NÃO ENCONTRADO":
-            keywords = {
-                "Orgão": ["órgão", "entidade", "prefeitura", "secretaria", "governo"],
-                "CNPJ Órgão": ["cnpj", "inscrição", "código"],
-                "Cidade e Estado": ["município", "cidade", "estado", "uf", "localização"],
-                "Nº Pregão e Processo": ["pregão", "processo", "número", "nº"],
-                "Telefones": ["telefone", "fones", "contato", "lado", "fale conosco"],
-                "E-mail": ["e-mail", "email", "contato", "fale conosco"],
-                "Prazo de pagamento": ["prazo", "pagamento", "vencimento", "pago"],
-                "Plataforma": ["plataforma", "sistema", "ferramenta", "sistema de licitação"],
-                "UASG": ["uasg", "código uasg", "código uasg"],
-                "Modalidade de compra": ["modalidade", "tipo", "licitação", "compra"],
-                "Prazo de entrega": ["prazo", "entrega", "entregas", "recepção"],
-                "Local de entrega": ["local", "entrega", "recepção", "fornecimento"],
-                "Validade da proposta": ["validade", "proposta", "válido", "prazo"],
-                "Catálogo técnico": ["catálogo", "técnic", "especificação", "ficha"],
-                "Modo de Disputa": ["modo", "disputa", "aberto", "fechado"]
-            }
-            
-            for keyword in keywords.get(field_name, []):
-                pattern = re.compile(rf"\b{re.escape(keyword)}\b", re.IGNORECASE)
-                matches = pattern.findall(ocr_text)
-                
-                if matches:
-                    start_idx = ocr_text.find(matches[0])
-                    end_idx = start_idx + len(matches[0])
-                    
-                    # Busca para a direita
-                    for i in range(start_idx, min(start_idx + 200, len(ocr_text))):
-                        if ocr_text[i] in ['\n', ' ', '.', ';', ':', ')', '}', ']', '-', '–', '—', '–']:
-                            end_idx = i
-                            break
-                    
-                    # Busca para a esquerda
-                    for i in range(start_idx - 1, max(0, start_idx - 100), -1):
-                        if ocr_text[i] in ['\n', ' ', '.', ';', ':', '(', '{', '[', '-', '–', '—', '–']:
-                            start_idx = i
-                            break
-                    
-                    value = ocr_text[start_idx:end_idx].strip()
-                    if len(value) > 2:
-                        return value
-            
-            return "NÃO ENCONTRADO"
+            return self._extract_by_keywords(field_name, self._ocr_text)
         
         return extracted
     
     def get_edital_number(self):
         """Obtém o número do edital do nome do arquivo ou do texto"""
         # Primeiro, tente extrair do nome do arquivo
-        filename = os.path.basename(self.pdf_path)
-        match = re.search(r'(\d+[-_]\d+)', filename)
+        match = re.search(r'(\d+[-_]\d+)', self.filename)
         if match:
             return match.group(1).replace('_', '/').replace('-', '/')
         
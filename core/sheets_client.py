@@ -0,0 +1,111 @@
+import time
+import pickle
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+class SheetsClientCache:
+    """Cache por usuário das credenciais autorizadas e do serviço do Google Sheets já construído"""
+
+    def __init__(self, ttl_seconds=None, refresh_margin_seconds=None):
+        settings = Settings()
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.SHEETS_CLIENT_TTL
+        self.refresh_margin = timedelta(
+            seconds=refresh_margin_seconds if refresh_margin_seconds is not None else settings.SHEETS_TOKEN_REFRESH_MARGIN
+        )
+        self._entries = {}  # chave do usuário -> (credenciais, serviço, criado em)
+        self._key_locks = {}  # chave do usuário -> lock da autenticação/renovação desse usuário
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def build_service(creds):
+        """Constrói o serviço com o documento de descoberta embutido na biblioteca (sem requisição de rede)"""
+        from googleapiclient.discovery import build
+        return build('sheets', 'v4', credentials=creds, static_discovery=True, cache_discovery=False)
+
+    def _refresh_if_expiring(self, creds, token_path):
+        """Renova o token antes de expirar e grava o token renovado"""
+        expiry = getattr(creds, 'expiry', None)
+        if not expiry or not getattr(creds, 'refresh_token', None):
+            return
+        # expiry das credenciais do Google é um datetime UTC sem fuso
+        now = datetime.now(timezone.utc)
+        if expiry.tzinfo is None:
+            now = now.replace(tzinfo=None)
+        if expiry - now > self.refresh_margin:
+            return
+
+        from google.auth.transport.requests import Request
+        creds.refresh(Request())
+        logger.info("🔑 Token do Google renovado antes de expirar")
+        if token_path:
+            with open(token_path, 'wb') as token:
+                pickle.dump(creds, token)
+
+    def _key_lock(self, key):
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def get(self, key, authenticate, token_path=None):
+        """Retorna (credenciais, serviço) do usuário; `authenticate()` só é chamado quando não há entrada válida
+
+        Autenticação (que pode esperar o OAuth interativo) e renovação do token (rede) seguram só o
+        lock do próprio usuário: os envios dos demais usuários não esperam.
+        """
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[2] < self.ttl_seconds:
+                creds, service, _ = entry
+                try:
+                    self._refresh_if_expiring(creds, token_path)
+                    with self._lock:
+                        self.hits += 1
+                    return creds, service
+                except Exception as e:
+                    logger.error(f"Erro ao renovar token: {str(e)}")
+                    with self._lock:
+                        self._entries.pop(key, None)
+
+            with self._lock:
+                self.misses += 1
+            creds = authenticate()
+            if creds is None:
+                logger.error("Credenciais não autenticadas. Tente autenticar novamente.")
+                return None, None
+
+            try:
+                self._refresh_if_expiring(creds, token_path)
+                service = self.build_service(creds)
+            except Exception as e:
+                logger.error(f"Erro ao criar o serviço do Google Sheets: {str(e)}")
+                return creds, None
+
+            with self._lock:
+                self._entries[key] = (creds, service, time.monotonic())
+            return creds, service
+
+    def register(self, key, creds, service):
+        """Registra um cliente já pronto (por exemplo um serviço apontado para um stub local)"""
+        with self._lock:
+            self._entries[key] = (creds, service, time.monotonic())
+
+    def invalidate(self, key=None):
+        """Descarta a entrada de um usuário (ou todas), por exemplo após trocar as credenciais"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+# Compartilhado por main.py e app.py dentro do mesmo processo
+SHEETS_CLIENTS = SheetsClientCache()
@@ -1,28 +1,61 @@
 import os
 import pickle
 import json
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
 from config.settings import Settings
 from config.user_settings import UserSettings
 from utils.file_manager import FileManager
+from core.sheets_client import SHEETS_CLIENTS
+from utils.sheets_retry import execute_with_retry, get_limiter
 import logging
 import tempfile
 import sys
+import time
 
 logger = logging.getLogger(__name__)
 
 class SheetsUploader:
+    # Cada envio é gravado na planilha na hora (sem buffer)
+    buffered = False
+    
     def __init__(self, user_id=None, username=None):
         self.user_settings = UserSettings(user_id, username)
-        self.creds = self._authenticate()
-        self.service = self._get_service()
+        self._auth_failed = False
+        # Autentica (ou reaproveita o cliente já autenticado do usuário) já na criação
+        self._get_service()
+    
+    @property
+    def creds(self):
+        return self._get_client()[0]
+    
+    @property
+    def service(self):
+        return self._get_service()
+    
+    def _token_path(self):
+        return f'token_{self.user_settings.user_id}.pickle' if self.user_settings.user_id else 'token.pickle'
+    
+    def _get_client(self):
+        """Credenciais e serviço do usuário, compartilhados entre uploaders pelo cache de clientes"""
+        # Assim como antes, cada uploader tenta autenticar uma única vez
+        if self._auth_failed:
+            return None, None
+        creds, service = SHEETS_CLIENTS.get(self.user_settings.user_id, self._authenticate, self._token_path())
+        if service is None:
+            self._auth_failed = True
+        return creds, service
+    
+    def _execute(self, request):
+        """Executa a requisição respeitando a cota do usuário e repetindo erros 429/5xx com backoff"""
+        return execute_with_retry(request, get_limiter(self.user_settings.user_id))
     
     def _authenticate(self):
         """Autentica com base nas credenciais do usuário logado"""
+        # Bibliotecas do OAuth só são carregadas quando o cache de clientes não tem entrada válida
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from google.auth.transport.requests import Request
+        
         creds = None
-        token_path = f'token_{self.user_settings.user_id}.pickle' if self.user_settings.user_id else 'token.pickle'
+        token_path = self._token_path()
         
         # Verifica se o token existe
         if os.path.exists(token_path):
@@ -98,17 +131,25 @@ class SheetsUploader:
         return creds
     
     def _get_service(self):
-        """Obtém o serviço do Google Sheets"""
-        if self.creds is None:
-            logger.error("Credenciais não autenticadas. Tente autenticar novamente.")
-            return None
-        
-        try:
-            # Tenta construir o serviço do Google Sheets
-            return build('sheets', 'v4', credentials=self.creds)
-        except Exception as e:
-            logger.error(f"Erro ao criar o serviço do Google Sheets: {str(e)}")
-            return None
+        """Obtém o serviço do Google Sheets (construído uma vez por usuário e reaproveitado até o TTL)"""
+        return self._get_client()[1]
+    
+    @staticmethod
+    def _format_value(field, value):
+        """Ajusta o valor de um campo para o formato da planilha"""
+        if field == "Nº Pregão e Processo" and "NÃO ENCONTRADO" not in value:
+            value = value.replace("PROCESSO ADMINISTRATIVO No", "PROCESSO:").replace("PREGÃO ELETRÔNICO No", "PREGÃO:")
+        return value
+    
+    def flush(self):
+        """Nada a enviar: o modo por células grava a cada documento"""
+        return True
+    
+    def flush_if_due(self):
+        return True
+    
+    def close(self):
+        return True
     
     def update_sheet(self, data, edital_link=None):
         """Atualiza a planilha com dados extraídos"""
@@ -126,14 +167,9 @@ class SheetsUploader:
         batch_data = []
         
         for field, cell_ref in self.user_settings.CELL_MAPPING.items():
-            value = data.get(field, "NÃO ENCONTRADO")
-            
-            if field == "Nº Pregão e Processo" and "NÃO ENCONTRADO" not in value:
-                value = value.replace("PROCESSO ADMINISTRATIVO No", "PROCESSO:").replace("PREGÃO ELETRÔNICO No", "PREGÃO:")
-            
             batch_data.append({
                 "range": cell_ref,
-                "values": [[value]]
+                "values": [[self._format_value(field, data.get(field, "NÃO ENCONTRADO"))]]
             })
         
         try:
@@ -142,10 +178,10 @@ class SheetsUploader:
                 "data": batch_data
             }
             
-            result = self.service.spreadsheets().values().batchUpdate(
+            result = self._execute(self.service.spreadsheets().values().batchUpdate(
                 spreadsheetId=spreadsheet_id,
                 body=body
-            ).execute()
+            ))
             
             logger.info(f"✅ {len(batch_data)} campos atualizados na planilha!")
             return True
@@ -175,13 +211,132 @@ class SheetsUploader:
                 "data": batch_data
             }
             
-            self.service.spreadsheets().values().batchUpdate(
+            self._execute(self.service.spreadsheets().values().batchUpdate(
                 spreadsheetId=spreadsheet_id,
                 body=body
-            ).execute()
+            ))
             
             logger.info("✅ Planilha limpa para novo edital!")
             return True
         except Exception as e:
             logger.error(f"❌ Erro ao limpar planilha: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+class SheetsRowSink(SheetsUploader):
+    """Grava cada edital como uma linha, acumulando linhas e enviando em um único values.append"""
+    
+    buffered = True
+    
+    def __init__(self, user_id=None, username=None, flush_rows=None, flush_seconds=None, rows_range=None):
+        super().__init__(user_id, username)
+        settings = Settings()
+        self.flush_rows = flush_rows or settings.SHEETS_FLUSH_ROWS
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.SHEETS_FLUSH_SECONDS
+        self.rows_range = rows_range or settings.SHEETS_ROWS_RANGE
+        self.columns = list(self.user_settings.CELL_MAPPING)
+        self._buffer = []  # [(linha, callback)]
+        self._first_buffered_at = None
+        self._header_missing = None  # None = ainda não consultado; só vira False depois de um append com sucesso
+        self.api_calls = 0
+    
+    def clear_sheet(self):
+        """No modo por linhas nada é apagado: cada edital ocupa a sua própria linha"""
+        return True
+    
+    def build_row(self, data):
+        return [self._format_value(field, data.get(field, "NÃO ENCONTRADO")) for field in self.columns]
+    
+    def update_sheet(self, data, edital_link=None, on_flushed=None):
+        """Acrescenta o edital ao buffer; `on_flushed(sucesso)` é chamado quando a linha for enviada"""
+        if self.service is None:
+            logger.error("Serviço do Google Sheets não inicializado. Tente autenticar novamente.")
+            return False
+        
+        data = dict(data)
+        if edital_link:
+            data["Edital de Licitação"] = edital_link
+        elif "Edital de Licitação" not in data:
+            data["Edital de Licitação"] = "LINK_NÃO_FORNECIDO"
+        
+        if not self._buffer:
+            self._first_buffered_at = time.monotonic()
+        self._buffer.append((self.build_row(data), on_flushed))
+        
+        # Uma falha no envio mantém as linhas no buffer para a próxima tentativa
+        if len(self._buffer) >= self.flush_rows:
+            self.flush()
+        else:
+            self.flush_if_due()
+        return True
+    
+    def flush_if_due(self):
+        """Envia o buffer se a linha mais antiga já esperou flush_seconds"""
+        if self._buffer and time.monotonic() - self._first_buffered_at >= self.flush_seconds:
+            return self.flush()
+        return True
+    
+    def _header_range(self):
+        sheet, _, _ = self.rows_range.rpartition('!')
+        return f"{sheet}!1:1" if sheet else "1:1"
+    
+    def _needs_header(self):
+        """Confere uma única vez se a primeira linha da planilha está vazia"""
+        if self._header_missing is None:
+            result = self._execute(self.service.spreadsheets().values().get(
+                spreadsheetId=self.user_settings.SPREADSHEET_ID,
+                range=self._header_range()
+            ))
+            self.api_calls += 1
+            self._header_missing = not result.get("values")
+        return self._header_missing
+    
+    def flush(self):
+        """Envia todas as linhas do buffer em uma chamada; em caso de erro as linhas continuam no buffer"""
+        if not self._buffer:
+            return True
+        
+        rows = [row for row, _ in self._buffer]
+        try:
+            if self._needs_header():
+                rows.insert(0, self.columns)
+            
+            self._execute(self.service.spreadsheets().values().append(
+                spreadsheetId=self.user_settings.SPREADSHEET_ID,
+                range=self.rows_range,
+                valueInputOption="USER_ENTERED",
+                insertDataOption="INSERT_ROWS",
+                body={"values": rows}
+            ))
+            self.api_calls += 1
+            success = True
+            logger.info(f"✅ {len(self._buffer)} edital(is) adicionados à planilha em uma chamada!")
+        except Exception as e:
+            logger.error(f"❌ Erro ao adicionar linhas na planilha: {str(e)}")
+            success = False
+        
+        if success:
+            # O cabeçalho só conta como escrito quando o append deu certo: após uma falha ele vai de novo
+            self._header_missing = False
+            buffered, self._buffer = self._buffer, []
+            for _, on_flushed in buffered:
+                if on_flushed:
+                    on_flushed(True)
+        return success
+    
+    def close(self):
+        """Envia o que sobrou no buffer; as linhas que não puderam ser enviadas são dadas como falha"""
+        success = self.flush()
+        if not success:
+            buffered, self._buffer = self._buffer, []
+            for _, on_flushed in buffered:
+                if on_flushed:
+                    on_flushed(False)
+        return success
+
+
+def create_sheets_sink(user_id=None, username=None):
+    """Cria o destino configurado em SHEETS_SINK: células fixas ("cells") ou uma linha por edital ("rows")"""
+    if Settings().SHEETS_SINK == "rows":
+        return SheetsRowSink(user_id, username)
+    return SheetsUploader(user_id, username)
@@ -0,0 +1,139 @@
+import os
+import threading
+import logging
+from config.settings import Settings
+from database.job_queue import JobQueue
+from utils.metrics import METRICS, start_metrics_server, export_metrics
+
+logger = logging.getLogger(__name__)
+
+class UploadService:
+    """Processa em segundo plano os PDFs enviados pela interface, drenando os jobs 'upload' da fila"""
+
+    def __init__(self, handler, workers=None, queue=None, poll_interval=1.0, spool_dir=None):
+        self.handler = handler  # handler(caminho_no_spool, nome_arquivo, user_id) -> (sucesso, mensagem)
+        self.workers = workers or Settings().UPLOAD_WORKERS
+        self.queue = queue or JobQueue()
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._in_flight = {}  # job_id -> worker_id
+        # Bytes de cada upload ficam em disco até o job terminar: a memória não cresce com a fila
+        # e um job retomado após a queda do processo ainda encontra o seu PDF
+        self.spool_dir = spool_dir or Settings().UPLOAD_SPOOL_DIR
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Inicia os workers (uma vez); jobs de uma execução anterior que caiu voltam para a fila"""
+        with self._lock:
+            if self._threads:
+                return
+            start_metrics_server()
+            reclaimed = self.queue.reclaim_dead_workers()
+            if reclaimed:
+                logger.info(f"🔁 {reclaimed} upload(s) interrompido(s) voltaram para a fila")
+
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"upload-worker-{i + 1}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            heartbeat = threading.Thread(target=self._heartbeat, name="upload-heartbeat", daemon=True)
+            heartbeat.start()
+            self._threads.append(heartbeat)
+
+    def submit(self, data, filename, user_id, batch_id, index=0):
+        """Grava o PDF no spool, enfileira e acorda os workers; retorna o id do job
+
+        O job guarda um identificador "upload://lote/índice/nome": arquivos de mesmo nome
+        (de usuários ou lotes diferentes) nunca colidem na fila nem no disco.
+        """
+        job_key = f"upload://{batch_id}/{index}/{os.path.basename(filename)}"
+        with self._lock:
+            job_id = self.queue.enqueue(job_key, 'upload', user_id=user_id, batch_id=batch_id)
+            temp_path = self._payload_path(job_id) + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self._payload_path(job_id))
+        self._wakeup.set()
+        return job_id
+
+    def batch_jobs(self, batch_id):
+        return self.queue.batch_jobs(batch_id)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def _run(self):
+        worker_id = JobQueue.new_worker_id()
+        while not self._stop.is_set():
+            job = self.queue.claim(worker_id, source='upload')
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            with self._lock:
+                self._in_flight[job['id']] = worker_id
+            try:
+                self._process(job)
+            finally:
+                with self._lock:
+                    self._in_flight.pop(job['id'], None)
+
+    def _payload_path(self, job_id):
+        return os.path.join(self.spool_dir, f"{job_id}.pdf")
+
+    def _process(self, job):
+        file_name = os.path.basename(job['pdf_path'])
+        payload_path = self._payload_path(job['id'])
+        with self._lock:  # submit grava o spool com o lock: o arquivo já está completo aqui
+            exists = os.path.exists(payload_path)
+        if not exists:
+            self.queue.fail(job['id'], f"❌ Arquivo não disponível (envie novamente): {file_name}", retry=False)
+            return
+
+        try:
+            # O handler lê o PDF (e o OCR o rasteriza) direto do spool: o upload só é gravado em disco uma vez
+            success, message = self.handler(payload_path, file_name, job['user_id'])
+        except Exception as e:
+            logger.error(f"Erro ao processar {job['pdf_path']}: {str(e)}")
+            success, message = False, f"❌ Erro ao processar {file_name}: {str(e)}"
+        finally:
+            # O job termina aqui (sucesso ou falha definitiva): o spool não é mais necessário
+            # (após o sucesso o handler já o moveu para PDF_PROCESSED)
+            try:
+                os.remove(payload_path)
+            except OSError:
+                pass
+
+        METRICS.increment('documentos', resultado='sucesso' if success else 'falha')
+        if success:
+            self.queue.complete(job['id'], {'message': message})
+        else:
+            self.queue.fail(job['id'], message, retry=False)
+        export_metrics()
+
+    def _heartbeat(self):
+        """Renova o lease dos jobs em andamento (lotes longos com OCR não são reivindicados por outro processo)"""
+        interval = max(1.0, self.queue.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            with self._lock:
+                in_flight = list(self._in_flight.items())
+            for job_id, worker_id in in_flight:
+                self.queue.heartbeat(job_id, worker_id)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_upload_service(handler):
+    """Serviço único do processo (o script do Streamlit é reexecutado a cada interação, o módulo não)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = UploadService(handler)
+            _service.start()
+        return _service
@@ -1,13 +1,66 @@
 import sqlite3
 import os
+import queue
+import threading
+from contextlib import contextmanager
 from cryptography.fernet import Fernet
+from config.settings import Settings
+
+# SQL fixo: o sqlite3 reaproveita o statement preparado de cada conexão do pool
+SELECT_USER_BY_USERNAME = 'SELECT id, name, email, password_hash FROM users WHERE username = ?'
+INSERT_USER = '''
+INSERT INTO users (username, name, email, password_hash)
+VALUES (?, ?, ?, ?)
+'''
+UPSERT_GOOGLE_CREDENTIALS = '''
+INSERT INTO user_google_credentials (user_id, encrypted_credentials)
+VALUES (?, ?)
+ON CONFLICT (user_id) DO UPDATE SET
+    encrypted_credentials = excluded.encrypted_credentials,
+    created_at = CURRENT_TIMESTAMP
+'''
+SELECT_GOOGLE_CREDENTIALS = 'SELECT encrypted_credentials FROM user_google_credentials WHERE user_id = ?'
+UPSERT_SPREADSHEET_CONFIG = '''
+INSERT INTO user_sheet_configs (user_id, spreadsheet_id, spreadsheet_name)
+VALUES (?, ?, ?)
+ON CONFLICT (user_id) DO UPDATE SET
+    spreadsheet_id = excluded.spreadsheet_id,
+    spreadsheet_name = excluded.spreadsheet_name,
+    created_at = CURRENT_TIMESTAMP
+'''
+SELECT_SPREADSHEET_CONFIG = 'SELECT spreadsheet_id, spreadsheet_name FROM user_sheet_configs WHERE user_id = ?'
 
 class DatabaseManager:
-    def __init__(self):
-        self.db_path = os.path.join(os.path.dirname(__file__), 'users.db')
-        self.key_path = os.path.join(os.path.dirname(__file__), 'encryption.key')
-        self._init_encryption_key()
-        self._init_database()
+    """Acesso ao banco de usuários: uma instância por arquivo no processo, com pool de conexões em modo WAL"""
+    
+    _instances = {}
+    _instances_lock = threading.Lock()
+    
+    def __new__(cls, db_path=None):
+        db_path = os.path.abspath(db_path or os.path.join(os.path.dirname(__file__), 'users.db'))
+        with cls._instances_lock:
+            instance = cls._instances.get(db_path)
+            if instance is None:
+                instance = super().__new__(cls)
+                instance._initialized = False
+                instance._init_lock = threading.Lock()
+                cls._instances[db_path] = instance
+        return instance
+    
+    def __init__(self, db_path=None):
+        # Chave, esquema e migrações são preparados uma única vez por processo
+        with self._init_lock:
+            if self._initialized:
+                return
+            self.db_path = os.path.abspath(db_path or os.path.join(os.path.dirname(__file__), 'users.db'))
+            self.key_path = os.path.join(os.path.dirname(self.db_path), 'encryption.key')
+            self.pool_size = max(1, Settings().DB_POOL_SIZE)
+            self._pool = queue.LifoQueue()
+            self._created = 0
+            self._pool_lock = threading.Lock()
+            self._init_encryption_key()
+            self._init_database()
+            self._initialized = True
     
     def _init_encryption_key(self):
         """Gera ou carrega a chave de criptografia"""
@@ -20,95 +73,110 @@ class DatabaseManager:
                 key = key_file.read()
         self.cipher_suite = Fernet(key)
     
-    def _init_database(self):
-        """Cria as tabelas do banco de dados se não existirem"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Tabela de usuários
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            email TEXT NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # Tabela de configurações do Google Sheets
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_sheet_configs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            spreadsheet_id TEXT NOT NULL,
-            spreadsheet_name TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-        )
-        ''')
+    def _new_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, cached_statements=64)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+    
+    @contextmanager
+    def _connection(self):
+        """Empresta uma conexão do pool (criando até pool_size) e faz commit/rollback ao devolver"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                can_create = self._created < self.pool_size
+                if can_create:
+                    self._created += 1
+            conn = self._new_connection() if can_create else self._pool.get()
         
-        # Tabela para armazenar credenciais do Google criptografadas
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_google_credentials (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            encrypted_credentials BLOB NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
-        )
-        ''')
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._pool.put(conn)
+    
+    def _init_database(self):
+        """Cria as tabelas do banco de dados se não existirem e aplica as migrações pendentes"""
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            cursor = conn.cursor()
+            
+            # Tabela de usuários
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            ''')
+            
+            # Tabela de configurações do Google Sheets
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_sheet_configs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                spreadsheet_id TEXT NOT NULL,
+                spreadsheet_name TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            # Tabela para armazenar credenciais do Google criptografadas
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS user_google_credentials (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                encrypted_credentials BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+            )
+            ''')
+            
+            self._migrate(cursor)
+    
+    def _migrate(self, cursor):
+        """Migrações versionadas por PRAGMA user_version"""
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
         
-        conn.commit()
-        conn.close()
+        if version < 1:
+            # INSERT OR REPLACE sem restrição única acumulava linhas por usuário: mantém só a mais recente
+            for table in ('user_sheet_configs', 'user_google_credentials'):
+                cursor.execute(f'''
+                DELETE FROM {table}
+                WHERE id NOT IN (SELECT MAX(id) FROM {table} GROUP BY user_id)
+                ''')
+                cursor.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_user_id ON {table} (user_id)')
+            cursor.execute('PRAGMA user_version = 1')
     
     def get_user_by_username(self, username):
         """Obtém informações do usuário pelo nome de usuário"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, name, email, password_hash FROM users WHERE username = ?', (username,))
-        user = cursor.fetchone()
-        conn.close()
-        return user
+        with self._connection() as conn:
+            return conn.execute(SELECT_USER_BY_USERNAME, (username,)).fetchone()
     
     def create_user(self, username, name, email, password_hash):
         """Cria um novo usuário"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         try:
-            cursor.execute('''
-            INSERT INTO users (username, name, email, password_hash)
-            VALUES (?, ?, ?, ?)
-            ''', (username, name, email, password_hash))
-            user_id = cursor.lastrowid
-            conn.commit()
-            return user_id
+            with self._connection() as conn:
+                cursor = conn.execute(INSERT_USER, (username, name, email, password_hash))
+                return cursor.lastrowid
         except sqlite3.IntegrityError:
-            conn.close()
             return None
-        finally:
-            conn.close()
     
     def save_google_credentials(self, user_id, credentials_json):
         """Salva credenciais do Google criptografadas"""
         encrypted_data = self.cipher_suite.encrypt(credentials_json.encode())
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT OR REPLACE INTO user_google_credentials (user_id, encrypted_credentials)
-        VALUES (?, ?)
-        ''', (user_id, encrypted_data))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            conn.execute(UPSERT_GOOGLE_CREDENTIALS, (user_id, encrypted_data))
     
     def get_google_credentials(self, user_id):
         """Obtém credenciais do Google descriptografadas"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT encrypted_credentials FROM user_google_credentials WHERE user_id = ?', (user_id,))
-        result = cursor.fetchone()
-        conn.close()
+        with self._connection() as conn:
+            result = conn.execute(SELECT_GOOGLE_CREDENTIALS, (user_id,)).fetchone()
         
         if result:
             encrypted_data = result[0]
@@ -118,22 +186,13 @@ class DatabaseManager:
     
     def save_spreadsheet_config(self, user_id, spreadsheet_id, spreadsheet_name=None):
         """Salva configuração da planilha do usuário"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-        INSERT OR REPLACE INTO user_sheet_configs (user_id, spreadsheet_id, spreadsheet_name)
-        VALUES (?, ?, ?)
-        ''', (user_id, spreadsheet_id, spreadsheet_name))
-        conn.commit()
-        conn.close()
+        with self._connection() as conn:
+            conn.execute(UPSERT_SPREADSHEET_CONFIG, (user_id, spreadsheet_id, spreadsheet_name))
     
     def get_spreadsheet_config(self, user_id):
         """Obtém configuração da planilha do usuário"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT spreadsheet_id, spreadsheet_name FROM user_sheet_configs WHERE user_id = ?', (user_id,))
-        result = cursor.fetchone()
-        conn.close()
+        with self._connection() as conn:
+            result = conn.execute(SELECT_SPREADSHEET_CONFIG, (user_id,)).fetchone()
         
         if result:
             return {
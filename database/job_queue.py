@@ -0,0 +1,257 @@
+import sqlite3
+import os
+import json
+import time
+import uuid
+import socket
+from config.settings import Settings
+
+# Constantes da API do Windows usadas em JobQueue._pid_alive_windows
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+ERROR_ACCESS_DENIED = 5
+STILL_ACTIVE = 259
+
+class JobQueue:
+    """Fila persistente (SQLite) de PDFs a processar, com estados, tentativas e lease para retomar após falhas"""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __init__(self, db_path=None, lease_seconds=None, max_attempts=None):
+        self.db_path = db_path or os.path.join(os.path.dirname(__file__), 'jobs.db')
+        settings = Settings()
+        self.lease_seconds = lease_seconds or settings.JOB_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        self._init_database()
+
+    @staticmethod
+    def new_worker_id():
+        """Identificador do processo que reivindica jobs (host, pid e sufixo aleatório)"""
+        return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        """Cria a tabela de jobs se não existir"""
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pdf_path TEXT NOT NULL,
+            source TEXT NOT NULL,
+            user_id INTEGER,
+            batch_id TEXT,
+            state TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            worker_id TEXT,
+            lease_expires_at REAL,
+            last_error TEXT,
+            result TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs (state, source, id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id, state)')
+        # Um mesmo arquivo não pode ter dois jobs ativos ao mesmo tempo
+        conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_path ON jobs (pdf_path)
+        WHERE state IN ('pending', 'running')
+        ''')
+        conn.close()
+
+    def enqueue(self, pdf_path, source, user_id=None, batch_id=None):
+        """Enfileira um PDF; se já houver job ativo para o arquivo, retorna o id existente"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            cursor = conn.execute('''
+            INSERT INTO jobs (pdf_path, source, user_id, batch_id, state, created_at, updated_at)
+            VALUES (?, ?, ?, ?, 'pending', ?, ?)
+            ''', (pdf_path, source, user_id, batch_id, now, now))
+            return cursor.lastrowid
+        except sqlite3.IntegrityError:
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE pdf_path = ? AND state IN ('pending', 'running')",
+                (pdf_path,)
+            ).fetchone()
+            return row['id'] if row else None
+        finally:
+            conn.close()
+
+    def claim(self, worker_id, source=None, user_id=None, batch_id=None):
+        """Reivindica o job pendente mais antigo (ou um em execução com lease expirado)"""
+        now = time.time()
+        filters = ''
+        params = [now]
+        for column, value in (('source', source), ('user_id', user_id), ('batch_id', batch_id)):
+            if value is not None:
+                filters += f' AND {column} = ?'
+                params.append(value)
+
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            # Lease expirado sem tentativas restantes: o job é dado como falho
+            conn.execute('''
+            UPDATE jobs SET state = 'failed', last_error = 'Lease expirado sem tentativas restantes', updated_at = ?
+            WHERE state = 'running' AND lease_expires_at < ? AND attempts >= ?
+            ''', (now, now, self.max_attempts))
+
+            row = conn.execute(f'''
+            SELECT * FROM jobs
+            WHERE (state = 'pending' OR (state = 'running' AND lease_expires_at < ?)){filters}
+            ORDER BY id
+            LIMIT 1
+            ''', params).fetchone()
+
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+
+            conn.execute('''
+            UPDATE jobs
+            SET state = 'running', attempts = attempts + 1, worker_id = ?, lease_expires_at = ?, updated_at = ?
+            WHERE id = ?
+            ''', (worker_id, now + self.lease_seconds, now, row['id']))
+            conn.execute('COMMIT')
+
+            job = dict(row)
+            job.update(state=self.RUNNING, attempts=row['attempts'] + 1, worker_id=worker_id)
+            return job
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        finally:
+            conn.close()
+
+    def reclaim_dead_workers(self):
+        """Libera na hora os jobs de processos desta máquina que já morreram (sem esperar o lease)"""
+        hostname = socket.gethostname()
+        conn = self._connect()
+        rows = conn.execute("SELECT id, worker_id FROM jobs WHERE state = 'running'").fetchall()
+        reclaimed = 0
+        for row in rows:
+            host, _, rest = (row['worker_id'] or '').partition(':')
+            pid = rest.partition(':')[0]
+            if host != hostname or not pid.isdigit() or self._pid_alive(int(pid)):
+                continue
+            conn.execute(
+                "UPDATE jobs SET lease_expires_at = 0 WHERE id = ? AND state = 'running'",
+                (row['id'],)
+            )
+            reclaimed += 1
+        conn.close()
+        return reclaimed
+
+    @staticmethod
+    def _pid_alive(pid):
+        """Confere se o processo dono de um job ainda existe; na dúvida considera vivo (o lease expira sozinho)"""
+        if os.name == 'nt':
+            return JobQueue._pid_alive_windows(pid)
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except (PermissionError, OSError):
+            return True
+        return True
+
+    @staticmethod
+    def _pid_alive_windows(pid):
+        """No Windows o sinal 0 é CTRL_C_EVENT: o estado do processo vem de OpenProcess/GetExitCodeProcess"""
+        try:
+            import ctypes
+            kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+            handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+            if not handle:
+                # Sem acesso o processo existe (é de outro usuário); qualquer outro erro é pid inexistente
+                return ctypes.get_last_error() == ERROR_ACCESS_DENIED
+            try:
+                exit_code = ctypes.c_ulong()
+                if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                    return True
+                return exit_code.value == STILL_ACTIVE
+            finally:
+                kernel32.CloseHandle(handle)
+        except (AttributeError, OSError):
+            return True
+
+    def heartbeat(self, job_id, worker_id):
+        """Renova o lease de um job em execução"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute('''
+        UPDATE jobs SET lease_expires_at = ?, updated_at = ?
+        WHERE id = ? AND worker_id = ? AND state = 'running'
+        ''', (now + self.lease_seconds, now, job_id, worker_id))
+        conn.close()
+
+    def complete(self, job_id, result=None):
+        """Marca o job como concluído"""
+        conn = self._connect()
+        conn.execute('''
+        UPDATE jobs SET state = 'done', lease_expires_at = NULL, last_error = NULL, result = ?, updated_at = ?
+        WHERE id = ?
+        ''', (json.dumps(result, ensure_ascii=False) if result is not None else None, time.time(), job_id))
+        conn.close()
+
+    def fail(self, job_id, error, retry=True):
+        """Registra a falha; o job volta para a fila enquanto houver tentativas"""
+        conn = self._connect()
+        row = conn.execute('SELECT attempts FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        state = self.PENDING if retry and row and row['attempts'] < self.max_attempts else self.FAILED
+        conn.execute('''
+        UPDATE jobs SET state = ?, lease_expires_at = NULL, last_error = ?, updated_at = ?
+        WHERE id = ?
+        ''', (state, str(error), time.time(), job_id))
+        conn.close()
+        return state
+
+    def get(self, job_id):
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def batch_jobs(self, batch_id):
+        """Jobs de um lote na ordem de envio"""
+        conn = self._connect()
+        rows = conn.execute('SELECT * FROM jobs WHERE batch_id = ? ORDER BY id', (batch_id,)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def unfinished_batch(self, source):
+        """batch_id do lote mais recente da origem que ainda tem jobs pendentes ou em execução"""
+        conn = self._connect()
+        row = conn.execute('''
+        SELECT batch_id FROM jobs
+        WHERE source = ? AND state IN ('pending', 'running') AND batch_id IS NOT NULL
+        ORDER BY id DESC LIMIT 1
+        ''', (source,)).fetchone()
+        conn.close()
+        return row['batch_id'] if row else None
+
+    def counts(self, batch_id=None, source=None, user_id=None):
+        """Quantidade de jobs por estado"""
+        filters = []
+        params = []
+        for column, value in (('batch_id', batch_id), ('source', source), ('user_id', user_id)):
+            if value is not None:
+                filters.append(f'{column} = ?')
+                params.append(value)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ''
+
+        conn = self._connect()
+        rows = conn.execute(f'SELECT state, COUNT(*) AS total FROM jobs {where} GROUP BY state', params).fetchall()
+        conn.close()
+
+        counts = {self.PENDING: 0, self.RUNNING: 0, self.DONE: 0, self.FAILED: 0}
+        counts.update({row['state']: row['total'] for row in rows})
+        return counts
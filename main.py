@@ -1,99 +1,449 @@
 import time
 import sys
 import os
+import signal
+import uuid
+import argparse
+from collections import deque
+from multiprocessing import parent_process
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from core.pdf_processor import PDFProcessor
-from core.sheets_uploader import SheetsUploader
+from core.sheets_uploader import create_sheets_sink
 from utils.file_manager import FileManager
+from utils.ocr_handler import OCRHandler
+from utils.folder_watcher import FolderWatcher
+from database.job_queue import JobQueue
+from utils.sheets_retry import SHEETS_STATS
+from utils.metrics import METRICS, start_metrics_server, export_metrics, pattern_costs
+from utils.profiler import profile_document
 from config.settings import Settings
 
-def process_single_pdf(pdf_path, uploader, clear_sheet=True):
+def init_worker(processes=1):
+    """Processos do pool ignoram CTRL+C; a interrupção é tratada pelo processo principal"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # O pool de OCR de cada processo fica com 1/N das CPUs e do orçamento de memória
+    OCRHandler.set_process_share(processes)
+    # Métricas herdadas do processo principal pelo fork não podem voltar somadas de novo
+    METRICS.drain()
+
+def worker_metrics():
+    """Métricas acumuladas em um processo do pool, devolvidas junto com o resultado (None no processo principal)"""
+    return METRICS.drain() if parent_process() is not None else None
+
+def extract_pdf_worker(pdf_path):
+    """Extrai os campos de um PDF dentro de um processo do pool (sem acessar a planilha)"""
+    timings = {}
+    try:
+        start = time.perf_counter()
+        processor = PDFProcessor(pdf_path)
+        # Com --profile/PROFILE_MODE o processamento do documento é perfilado; sem ele o contexto é nulo
+        with profile_document(processor.get_edital_number(), processor.filename):
+            # No modo streaming a leitura das páginas acontece junto com a extração dos campos
+            if not processor.settings.STREAMING_EXTRACTION:
+                processor.extract_text()
+            timings['texto'] = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            extracted_data = processor.extract_all_fields()
+            timings['campos'] = time.perf_counter() - start
+        
+        return {
+            'pdf_path': pdf_path,
+            'data': extracted_data,
+            'edital_number': processor.get_edital_number(),
+            'timings': timings,
+            'error': None,
+            'metrics': worker_metrics(),
+        }
+    except Exception as e:
+        return {'pdf_path': pdf_path, 'data': None, 'edital_number': None, 'timings': timings, 'error': str(e),
+                'metrics': worker_metrics()}
+
+def publish_extraction(result, uploader, clear_sheet, timings, on_published=None):
+    """Envia o resultado de uma extração para a planilha e move o PDF (executado no processo principal)
+    
+    Com um destino em buffer (uma linha por edital) o envio só é confirmado no flush: nesse caso retorna
+    None e `on_published(sucesso)` é chamado depois. Nos demais casos retorna o sucesso na hora.
+    """
+    on_published = on_published or (lambda success: None)
+    pdf_path = result['pdf_path']
+    METRICS.merge(result.get('metrics'))
     print(f'\n{"="*60}')
     print(f'📄 PROCESSANDO: {os.path.basename(pdf_path)}')
     print(f'{"="*60}')
     
+    if result['error']:
+        print(f'\n❌ ERRO CRÍTICO: {result["error"]}')
+        on_published(False)
+        return False
+    
     try:
+        start = time.perf_counter()
         if clear_sheet:
             uploader.clear_sheet()
         
-        processor = PDFProcessor(pdf_path)
-        extracted_data = processor.extract_all_fields()
-        
         print('\n🔍 DADOS EXTRAÍDOS:')
         print('-' * 40)
-        for field, value in extracted_data.items():
+        for field, value in result['data'].items():
             print(f'{field}: {value}')
         print('-' * 40)
         
         print('\n☁️  ENVIANDO PARA GOOGLE SHEETS...')
-        success = uploader.update_sheet(extracted_data)
-        
-        if success:
-            edital_number = processor.get_edital_number()
-            FileManager().move_to_processed(pdf_path, edital_number)
-            print('\n✅ PROCESSAMENTO CONCLUÍDO COM SUCESSO!')
-            return True
+        if uploader.buffered:
+            with METRICS.span('envio', os.path.basename(pdf_path)):
+                accepted = uploader.update_sheet(
+                    result['data'],
+                    on_flushed=lambda success: finish_publish(result, success, timings, on_published, deferred=True)
+                )
+            timings['upload'] += time.perf_counter() - start
+            if accepted:
+                print('\n📥 Linha adicionada ao buffer da planilha')
+                return None
+            success = False
         else:
-            print('\n❌ FALHA NO ENVIO PARA A PLANILHA')
-            return False
-            
+            with METRICS.span('envio', os.path.basename(pdf_path)):
+                success = uploader.update_sheet(result['data'])
+            timings['upload'] += time.perf_counter() - start
+        
+        return finish_publish(result, success, timings, on_published)
+    
     except Exception as e:
         print(f'\n❌ ERRO CRÍTICO: {str(e)}')
+        on_published(False)
         return False
 
-def watch_folder_mode():
+def finish_publish(result, success, timings, on_published, deferred=False):
+    """Move o PDF depois que a planilha confirmou o envio e repassa o desfecho para `on_published`"""
+    pdf_path = result['pdf_path']
+    if not success:
+        print(f'\n❌ FALHA NO ENVIO PARA A PLANILHA{f": {os.path.basename(pdf_path)}" if deferred else ""}')
+        on_published(False)
+        return False
+    
+    start = time.perf_counter()
+    with METRICS.span('mover', os.path.basename(pdf_path)):
+        moved = FileManager().move_to_processed(pdf_path, result['edital_number'])
+    timings['mover'] += time.perf_counter() - start
+    if not moved:
+        # move_to_processed não levanta exceção: o PDF continua em PDF_TO_PROCESS e o job não é dado como concluído
+        result['error'] = f"Enviado para a planilha, mas não foi possível mover para processados: {os.path.basename(pdf_path)}"
+        print(f"\n❌ ERRO: {result['error']}")
+        on_published(False)
+        return False
+    
+    if deferred:
+        print(f'✅ Enviado para a planilha: {os.path.basename(pdf_path)}')
+    else:
+        print('\n✅ PROCESSAMENTO CONCLUÍDO COM SUCESSO!')
+    on_published(True)
+    return True
+
+def print_sheets_stats():
+    stats = SHEETS_STATS.snapshot()
+    print(f'☁️  Sheets: {stats["requisicoes"]} requisições, {stats["retentativas"]} retentativas '
+          f'({stats["espera_backoff_s"]:.1f}s de backoff), {stats["esperas_limite"]} esperas do limitador '
+          f'({stats["espera_limite_s"]:.1f}s)')
+
+def print_pattern_costs(top=5):
+    costs = pattern_costs(top=top)
+    if not costs:
+        return
+    print('🔎 Padrões regex mais caros:')
+    for name, runs, seconds, aborted in costs:
+        suffix = f', {aborted} abortado(s)' if aborted else ''
+        print(f'   {name}: {seconds:.3f}s em {runs} execuções{suffix}')
+
+def start_batch(queue, file_manager):
+    """Retoma o lote interrompido (se houver) ou enfileira os PDFs pendentes em um lote novo"""
+    reclaimed = queue.reclaim_dead_workers()
+    batch_id = queue.unfinished_batch('batch')
+    resumed = batch_id is not None
+    if not resumed:
+        batch_id = uuid.uuid4().hex
+    
+    # PDFs que chegaram depois da interrupção entram no mesmo lote
+    for pdf_path in file_manager.get_pending_pdfs():
+        queue.enqueue(pdf_path, 'batch', batch_id=batch_id)
+    
+    counts = queue.counts(batch_id=batch_id)
+    if resumed:
+        print(f'\n♻️  RETOMANDO LOTE INTERROMPIDO: {counts["done"]} já concluído(s), '
+              f'{counts["pending"] + counts["running"]} restante(s)')
+        if reclaimed:
+            print(f'🔁 {reclaimed} job(s) de um processo encerrado voltaram para a fila')
+    return batch_id, counts
+
+def missing_file_result(pdf_path):
+    return {'pdf_path': pdf_path, 'data': None, 'edital_number': None, 'timings': {},
+            'error': 'Arquivo não encontrado (movido ou removido)'}
+
+def new_extraction_pool(workers, processes=None):
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(processes or workers,))
+
+def submit_extraction(executor, pdf_path):
+    """Envia um PDF ao pool (None se o arquivo sumiu); com o pool quebrado devolve um future já falho"""
+    if not os.path.exists(pdf_path):
+        return None
+    try:
+        return executor.submit(extract_pdf_worker, pdf_path)
+    except BrokenProcessPool as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+
+def restart_extraction_pool(executor, workers):
+    """Troca um pool quebrado (processo morto por falta de memória no OCR, segfault no pdfminer) por um novo"""
+    print('\n⚠️  Um processo de extração foi encerrado; recriando o pool')
+    executor.shutdown(wait=False, cancel_futures=True)
+    return new_extraction_pool(workers)
+
+def run_isolated(pdf_path, processes):
+    """Reextrai sozinho, em um processo próprio, um PDF perdido quando o pool quebrou
+    
+    Os outros jobs em voo morrem junto com o processo culpado; se este processo também morrer,
+    o problema é o próprio PDF e só ele falha.
+    """
+    print(f'\n🔁 {os.path.basename(pdf_path)}: extração interrompida; repetindo em um processo isolado')
+    # Roda junto com os processos do pool recriado: o OCR é dividido entre todos
+    with new_extraction_pool(1, processes) as solo:
+        try:
+            return solo.submit(extract_pdf_worker, pdf_path).result()
+        except BrokenProcessPool as e:
+            return {'pdf_path': pdf_path, 'data': None, 'edital_number': None, 'timings': {},
+                    'error': f'Processo de extração encerrado ao processar este arquivo: {e}'}
+
+def job_finisher(queue, job, result, stats=None):
+    """Callback que registra o desfecho de um job; falhas de extração/envio não são repetidas automaticamente"""
+    def on_published(success):
+        METRICS.increment('documentos', resultado='sucesso' if success else 'falha')
+        if success:
+            queue.complete(job['id'], {'edital_number': result.get('edital_number')})
+        else:
+            queue.fail(job['id'], result.get('error') or 'Falha no envio para a planilha', retry=False)
+        if stats is not None:
+            stats['enviados' if success else 'falhas'] += 1
+    return on_published
+
+def parallel_batch_process_mode(workers=None):
+    """Modo em lote com extração em um pool de processos; planilha e arquivos continuam em ordem no processo principal"""
     file_manager = FileManager()
-    uploader = SheetsUploader()
-    last_processed = {}
+    uploader = create_sheets_sink()
+    start_metrics_server()
+    workers = workers or Settings().BATCH_WORKERS or os.cpu_count() or 1
+    queue = JobQueue()
+    worker_id = JobQueue.new_worker_id()
+    
+    batch_id, counts = start_batch(queue, file_manager)
+    total = counts['pending'] + counts['running']
+    
+    if not total:
+        print('\nℹ️  Nenhum PDF encontrado na pasta para_processar/')
+        print('📁 Coloque seus arquivos PDF na pasta e execute novamente')
+        return
+    
+    print(f'\n📮 ENCONTRADOS {total} ARQUIVOS PARA PROCESSAR')
+    print(f'⚙️  Extraindo com {workers} processo(s) em paralelo')
+    
+    timings = {'texto': 0.0, 'campos': 0.0, 'upload': 0.0, 'mover': 0.0}
+    stats = {'enviados': 0, 'falhas': 0}
+    processed = 0
+    # Um lote retomado não limpa de novo o que já foi enviado
+    clear_sheet = counts['done'] == 0
+    batch_start = time.perf_counter()
+    
+    executor = new_extraction_pool(workers)
+    try:
+        in_flight = deque()
+        while True:
+            # Mantém o pool abastecido com jobs reivindicados na ordem da fila
+            while len(in_flight) < workers * 2:
+                job = queue.claim(worker_id, source='batch', batch_id=batch_id)
+                if job is None:
+                    break
+                in_flight.append((job, submit_extraction(executor, job['pdf_path']), executor))
+            
+            if not in_flight:
+                break
+            
+            # Os resultados são consumidos na ordem de envio para manter a planilha ordenada
+            job, future, pool = in_flight.popleft()
+            try:
+                result = future.result() if future else missing_file_result(job['pdf_path'])
+            except BrokenProcessPool:
+                # Um processo morto derruba todos os jobs em voo no mesmo pool
+                if pool is executor:
+                    executor = restart_extraction_pool(executor, workers)
+                result = run_isolated(job['pdf_path'], workers + 1)
+            except Exception as e:
+                result = {'pdf_path': job['pdf_path'], 'data': None, 'edital_number': None, 'timings': {}, 'error': str(e)}
+            
+            for stage, elapsed in result['timings'].items():
+                timings[stage] += elapsed
+            
+            processed += 1
+            print(f'\n{"="*60}')
+            print(f'📤 PROCESSAMENTO EM LOTE ({processed}/{total})')
+            print(f'{"="*60}')
+            
+            on_published = job_finisher(queue, job, result, stats)
+            if publish_extraction(result, uploader, clear_sheet, timings, on_published) is False:
+                print(f'\n⚠️  Continuando com o próximo arquivo...')
+            clear_sheet = False
+            
+            for waiting_job, _, _ in in_flight:
+                queue.heartbeat(waiting_job['id'], worker_id)
+        
+        start = time.perf_counter()
+        uploader.close()
+        timings['upload'] += time.perf_counter() - start
+    finally:
+        executor.shutdown(wait=True)
+    
+    elapsed = time.perf_counter() - batch_start
+    throughput = processed / (elapsed / 60) if elapsed > 0 else 0.0
+    
+    print(f"\n{'='*60}")
+    print(f'✅ PROCESSAMENTO EM LOTE CONCLUÍDO!')
+    print(f"{'='*60}")
+    print(f'📊 {stats["enviados"]}/{processed} arquivos enviados em {elapsed:.1f}s ({throughput:.1f} docs/min)')
+    print('⏱️  Tempo por etapa (soma de todos os arquivos):')
+    for stage, stage_time in timings.items():
+        print(f'   {stage}: {stage_time:.2f}s')
+    print_sheets_stats()
+    print_pattern_costs()
+    export_metrics()
+
+def watch_folder_mode():
+    settings = Settings()
+    FileManager()
+    uploader = create_sheets_sink()
+    queue = JobQueue()
+    worker_id = JobQueue.new_worker_id()
+    reclaimed = queue.reclaim_dead_workers()
+    watcher = FolderWatcher(settings.PDF_TO_PROCESS, settings.WATCH_POLL_INTERVAL, settings.WATCH_SETTLE_SECONDS)
+    executor = new_extraction_pool(settings.WATCH_WORKERS)
+    timings = {'texto': 0.0, 'campos': 0.0, 'upload': 0.0, 'mover': 0.0}
+    in_flight = {}
+    start_metrics_server()
     
     print('\n👁️  MODO DE MONITORAMENTO ATIVADO')
-    print(f'📋 Monitorando pasta: {Settings().PDF_TO_PROCESS}')
-    print('🔄 Verificando novos arquivos a cada 10 segundos...')
+    print(f'📋 Monitorando pasta: {settings.PDF_TO_PROCESS}')
+    if watcher.mode == 'inotify':
+        print('⚡ Novos arquivos detectados por eventos do sistema (inotify)')
+    else:
+        print(f'🔄 Verificando novos arquivos a cada {settings.WATCH_POLL_INTERVAL} segundos...')
+    print(f'⚙️  Até {settings.WATCH_WORKERS} arquivo(s) extraídos em paralelo')
     print('🛑 Pressione CTRL+C para parar\n')
     
+    pending = queue.counts(source='watch')['pending']
+    if pending:
+        print(f'♻️  Retomando {pending} arquivo(s) que ficaram na fila{f" ({reclaimed} interrompido(s))" if reclaimed else ""}\n')
+    
     try:
         while True:
-            pending_pdfs = file_manager.get_pending_pdfs()
+            # Arquivos só chegam aqui depois que o tamanho se estabiliza (cópia concluída)
+            for pdf_path in watcher.wait_ready(timeout=1.0):
+                queue.enqueue(pdf_path, 'watch')
+            
+            while len(in_flight) < settings.WATCH_WORKERS * 2:
+                job = queue.claim(worker_id, source='watch')
+                if job is None:
+                    break
+                in_flight[job['id']] = (job, submit_extraction(executor, job['pdf_path']), executor)
             
-            for pdf_path in pending_pdfs:
-                file_id = os.path.getmtime(pdf_path)
-                if pdf_path not in last_processed or last_processed[pdf_path] != file_id:
-                    process_single_pdf(pdf_path, uploader, clear_sheet=True)
-                    last_processed[pdf_path] = file_id
+            # Envio para a planilha e movimentação continuam serializados neste processo
+            for job_id, (job, future, pool) in list(in_flight.items()):
+                if future is not None and not future.done():
+                    queue.heartbeat(job_id, worker_id)
+                    continue
+                del in_flight[job_id]
+                pdf_path = job['pdf_path']
+                try:
+                    result = future.result() if future else missing_file_result(pdf_path)
+                except BrokenProcessPool:
+                    if pool is executor:
+                        executor = restart_extraction_pool(executor, settings.WATCH_WORKERS)
+                    result = run_isolated(pdf_path, settings.WATCH_WORKERS + 1)
+                except Exception as e:
+                    result = {'pdf_path': pdf_path, 'data': None, 'edital_number': None, 'timings': {}, 'error': str(e)}
+                
+                def on_published(success, finish=job_finisher(queue, job, result), pdf_path=pdf_path):
+                    finish(success)
+                    if success:
+                        watcher.forget(pdf_path)
+                
+                publish_extraction(result, uploader, clear_sheet=True, timings=timings, on_published=on_published)
+                export_metrics()
             
-            time.sleep(10)
+            # Linhas em buffer não esperam mais que SHEETS_FLUSH_SECONDS
+            uploader.flush_if_due()
             
     except KeyboardInterrupt:
         print('\n\n⏹️  Monitoramento interrompido pelo usuário')
+    finally:
+        uploader.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+        watcher.close()
+        export_metrics()
 
 def batch_process_mode():
     file_manager = FileManager()
-    uploader = SheetsUploader()
+    uploader = create_sheets_sink()
+    start_metrics_server()
+    queue = JobQueue()
+    worker_id = JobQueue.new_worker_id()
     
-    pending_pdfs = file_manager.get_pending_pdfs()
+    batch_id, counts = start_batch(queue, file_manager)
+    total = counts['pending'] + counts['running']
     
-    if not pending_pdfs:
+    if not total:
         print('\nℹ️  Nenhum PDF encontrado na pasta para_processar/')
         print('📁 Coloque seus arquivos PDF na pasta e execute novamente')
         return
     
-    print(f'\n📮 ENCONTRADOS {len(pending_pdfs)} ARQUIVOS PARA PROCESSAR')
+    print(f'\n📮 ENCONTRADOS {total} ARQUIVOS PARA PROCESSAR')
     
-    for i, pdf_path in enumerate(pending_pdfs, 1):
+    # Um lote retomado não limpa de novo o que já foi enviado
+    clear_sheet = counts['done'] == 0
+    timings = {'texto': 0.0, 'campos': 0.0, 'upload': 0.0, 'mover': 0.0}
+    i = 0
+    while True:
+        job = queue.claim(worker_id, source='batch', batch_id=batch_id)
+        if job is None:
+            break
+        
+        i += 1
+        pdf_path = job['pdf_path']
         print(f'\n{"="*60}')
-        print(f'📤 PROCESSAMENTO EM LOTE ({i}/{len(pending_pdfs)})')
+        print(f'📤 PROCESSAMENTO EM LOTE ({i}/{total})')
         print(f'{"="*60}')
         
-        clear_sheet = (i == 1)
-        success = process_single_pdf(pdf_path, uploader, clear_sheet)
-        
-        if not success:
+        result = extract_pdf_worker(pdf_path) if os.path.exists(pdf_path) else missing_file_result(pdf_path)
+        on_published = job_finisher(queue, job, result)
+        if publish_extraction(result, uploader, clear_sheet, timings, on_published) is False:
             print(f'\n⚠️  Continuando com o próximo arquivo...')
+        clear_sheet = False
+    
+    uploader.close()
     
     print(f"\n{'='*60}")
     print(f'✅ PROCESSAMENTO EM LOTE CONCLUÍDO!')
     print(f"{'='*60}")
+    print_sheets_stats()
+    print_pattern_costs()
+    export_metrics()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extração de editais para o Google Sheets')
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=['cprofile', 'sampler'],
+                        help='perfila cada documento (cProfile ou amostrador de pilha) e grava em PROFILE_DIR')
+    args = parser.parse_args()
+    if args.profile:
+        # Pela variável de ambiente o modo também chega aos processos do pool (inclusive com spawn)
+        os.environ['PROFILE_MODE'] = args.profile
+        Settings.PROFILE_MODE = args.profile
+    
     FileManager().organize_files()
     
     print('\n' + '='*65)
@@ -111,16 +461,21 @@ if __name__ == '__main__':
     
     print('\n📋 ESCOLHA O MODO DE OPERAÇÃO:')
     print('1. Processar todos os PDFs da pasta (modo em lote)')
-    print('2. Monitorar pasta continuamente (modo watch)')
-    print('3. Sair')
+    print('2. Processar todos os PDFs da pasta em paralelo (modo em lote paralelo)')
+    print('3. Monitorar pasta continuamente (modo watch)')
+    print('4. Sair')
     
-    choice = input('\n➤ Sua escolha (1-3): ').strip()
+    choice = input('\n➤ Sua escolha (1-4): ').strip()
     
     if choice == '1':
         batch_process_mode()
     elif choice == '2':
-        watch_folder_mode()
+        default_workers = Settings().BATCH_WORKERS or os.cpu_count() or 1
+        workers = input(f'➤ Número de processos (Enter = {default_workers}): ').strip()
+        parallel_batch_process_mode(int(workers) if workers.isdigit() and int(workers) > 0 else default_workers)
     elif choice == '3':
+        watch_folder_mode()
+    elif choice == '4':
         print('\n👋 Sistema encerrado. Até a próxima!')
     else:
         print('\n❌ Opção inválida. Tente novamente.')
\ No newline at end of file
@@ -1,16 +1,59 @@
 import base64
 import json
 import os
+import hmac
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.fernet import Fernet
+from config.settings import Settings
 
 class EncryptionManager:
+    # Chaves derivadas compartilhadas pelas instâncias do processo (LRU com expiração opcional)
+    _key_cache = OrderedDict()  # HMAC(senha, salt) -> (chave, criada em)
+    _key_cache_lock = threading.Lock()
+    # Segredo aleatório do processo: o índice do cache não permite testar senhas fora dele
+    _cache_secret = os.urandom(32)
+    
     def __init__(self):
         self.salt = b'static_salt_value_for_kdf'  # Em produção, use um salt aleatório por usuário
+        settings = Settings()
+        self.cache_size = settings.KDF_CACHE_SIZE
+        self.cache_ttl = settings.KDF_CACHE_TTL
+    
+    def _cache_key(self, password: str) -> bytes:
+        return hmac.new(self._cache_secret, self.salt + b'\0' + password.encode(), hashlib.sha256).digest()
     
     def derive_key(self, password: str) -> bytes:
-        """Deriva uma chave de criptografia a partir de uma senha"""
+        """Deriva uma chave de criptografia a partir de uma senha (PBKDF2 só na primeira vez por senha)"""
+        if self.cache_size <= 0:
+            return self._derive_key(password)
+        
+        cache_key = self._cache_key(password)
+        cls = type(self)
+        with cls._key_cache_lock:
+            entry = cls._key_cache.get(cache_key)
+            if entry and (not self.cache_ttl or time.monotonic() - entry[1] < self.cache_ttl):
+                cls._key_cache.move_to_end(cache_key)
+                return entry[0]
+        
+        key = self._derive_key(password)
+        with cls._key_cache_lock:
+            cls._key_cache[cache_key] = (key, time.monotonic())
+            cls._key_cache.move_to_end(cache_key)
+            while len(cls._key_cache) > self.cache_size:
+                cls._key_cache.popitem(last=False)
+        return key
+    
+    @classmethod
+    def clear_key_cache(cls):
+        with cls._key_cache_lock:
+            cls._key_cache.clear()
+    
+    def _derive_key(self, password: str) -> bytes:
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
@@ -0,0 +1,203 @@
+"""Retentativas e limitador do envio para o Sheets (utils/sheets_retry.py)"""
+import unittest
+from unittest import mock
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from benchmarks.sheets_stub import SheetsStub
+from config.settings import Settings
+from core.sheets_client import SHEETS_CLIENTS
+from core.sheets_uploader import SheetsUploader
+from utils.sheets_retry import TokenBucket, SheetsRetryStats, SHEETS_STATS, execute_with_retry
+
+
+def http_error(status, retry_after=None):
+    headers = {'status': status}
+    if retry_after is not None:
+        headers['retry-after'] = str(retry_after)
+    return HttpError(httplib2.Response(headers), b'{}')
+
+
+class FakeRequest:
+    """Requisição que levanta os erros informados, na ordem, e depois responde `result`"""
+
+    def __init__(self, *errors, result=None):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def execute(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+
+class FakeClock:
+    """Substitui time.monotonic/time.sleep: dormir só avança o relógio"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@mock.patch('utils.sheets_retry.time.sleep')
+class ExecuteWithRetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = SheetsRetryStats()
+
+    def run_request(self, request, **kwargs):
+        kwargs.setdefault('retries', 3)
+        return execute_with_retry(request, stats=self.stats, base_delay=0, max_delay=0, **kwargs)
+
+    def test_retries_rate_limit_and_server_errors(self, sleep):
+        request = FakeRequest(http_error(429), http_error(500), http_error(503), result={'ok': True})
+
+        self.assertEqual(self.run_request(request), {'ok': True})
+        self.assertEqual(request.calls, 4)
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['retentativas'], 3)
+        self.assertEqual(snapshot['falhas'], 0)
+        self.assertEqual(snapshot['status'], {429: 1, 500: 1, 503: 1})
+
+    def test_retries_network_errors(self, sleep):
+        request = FakeRequest(ConnectionError(), TimeoutError(), result='ok')
+
+        self.assertEqual(self.run_request(request), 'ok')
+        self.assertEqual(request.calls, 3)
+
+    def test_gives_up_after_retry_limit(self, sleep):
+        request = FakeRequest(*[http_error(503) for _ in range(5)])
+
+        with self.assertRaises(HttpError) as raised:
+            self.run_request(request, retries=2)
+        self.assertEqual(raised.exception.resp.status, 503)
+        self.assertEqual(request.calls, 3)
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['retentativas'], 2)
+        self.assertEqual(snapshot['falhas'], 1)
+
+    def test_non_retryable_errors_raise_immediately(self, sleep):
+        for error in (http_error(400), http_error(403), ValueError('erro de programação')):
+            request = FakeRequest(error, result='ok')
+            with self.assertRaises(type(error)):
+                self.run_request(request)
+            self.assertEqual(request.calls, 1)
+        self.assertEqual(self.stats.snapshot()['retentativas'], 0)
+        sleep.assert_not_called()
+
+    def test_backoff_respects_retry_after_up_to_maximum(self, sleep):
+        request = FakeRequest(http_error(429, retry_after=7), http_error(429, retry_after=90), result='ok')
+
+        execute_with_retry(request, stats=self.stats, retries=3, base_delay=1, max_delay=32)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [7.0, 32.0])
+
+    def test_rate_limit_penalizes_limiter(self, sleep):
+        limiter = mock.Mock(acquire=mock.Mock(return_value=0))
+        request = FakeRequest(http_error(429), http_error(503), result='ok')
+
+        self.run_request(request, limiter=limiter)
+        self.assertEqual(limiter.acquire.call_count, 3)
+        limiter.penalize.assert_called_once_with()
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.multiple('utils.sheets_retry.time', monotonic=self.clock.monotonic,
+                                      sleep=self.clock.sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_is_served_without_waiting(self):
+        bucket = TokenBucket(60, burst=5)
+
+        self.assertEqual([bucket.acquire() for _ in range(5)], [0.0] * 5)
+        self.assertGreater(bucket.acquire(), 0)
+
+    def test_never_exceeds_quota_in_any_rolling_minute(self):
+        for rate, burst in ((60, 5), (60, 60), (120, 10), (10, 1)):
+            self.clock.now = 0.0
+            bucket = TokenBucket(rate, burst=burst)
+            times = []
+            for _ in range(rate * 3):
+                bucket.acquire()
+                times.append(self.clock.now)
+            busiest = max(sum(1 for t in times if start <= t < start + 60) for start in times)
+            self.assertLessEqual(busiest, rate, f"rate={rate} burst={burst}")
+
+    def test_penalize_empties_bucket(self):
+        bucket = TokenBucket(60, burst=5)
+        bucket.penalize()
+
+        self.assertGreater(bucket.acquire(), 0)
+
+
+class SheetsUploaderRetryTest(unittest.TestCase):
+    """SheetsUploader contra o stub local, que devolve 429/503 de verdade pela API do googleapiclient"""
+
+    def setUp(self):
+        for name, value in (('RETRY_ATTEMPTS', 3), ('SHEETS_BACKOFF_BASE', 0.01), ('SHEETS_BACKOFF_MAX', 5)):
+            patcher = mock.patch.object(Settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Sem usuário logado valem as configurações padrão: o banco de usuários não é aberto
+        database = mock.patch('config.user_settings.DatabaseManager')
+        database.start()
+        self.addCleanup(database.stop)
+        # Relógio falso: backoff e espera do limitador não dormem de verdade, mas o tempo avança
+        self.clock = FakeClock()
+        self.sleeps = []
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.clock.sleep(seconds)
+        clock = mock.patch.multiple('utils.sheets_retry.time', monotonic=self.clock.monotonic, sleep=sleep)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.addCleanup(SHEETS_CLIENTS.invalidate, None)
+        SHEETS_STATS.reset()
+        # Limitador novo (criado com o relógio falso) e folgado: aqui interessa o backoff das respostas de erro
+        limiters = mock.patch.dict('utils.sheets_retry._limiters', {None: TokenBucket(6000, burst=10)}, clear=True)
+        limiters.start()
+        self.addCleanup(limiters.stop)
+
+    def test_update_sheet_backs_off_on_injected_errors_and_succeeds(self):
+        with SheetsStub(failures=[429, 503], retry_after=2) as stub:
+            SHEETS_CLIENTS.register(None, None, stub.service())
+            uploader = SheetsUploader()
+
+            self.assertTrue(uploader.update_sheet({"Orgão": "PREFEITURA MUNICIPAL DE TESTE"}))
+
+        self.assertEqual([status for *_, status in stub.requests], [429, 503, 200])
+        self.assertTrue(stub.cells, "a escrita bem-sucedida deve chegar ao stub")
+        snapshot = SHEETS_STATS.snapshot()
+        # Retry-After do 429 é respeitado; o 503 usa o backoff exponencial (até base * 2). Os 2 s de
+        # espera já repõem o limitador zerado pelo 429, então as únicas pausas são as do backoff
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertEqual(self.sleeps[0], 2.0)
+        self.assertLessEqual(self.sleeps[1], 0.02)
+        self.assertEqual(snapshot['esperas_limite'], 0)
+        self.assertEqual(snapshot['retentativas'], 2)
+        self.assertEqual(snapshot['falhas'], 0)
+        self.assertEqual(snapshot['status'], {429: 1, 503: 1})
+
+    def test_update_sheet_fails_after_retry_limit(self):
+        with SheetsStub(failures=[503] * 10) as stub:
+            SHEETS_CLIENTS.register(None, None, stub.service())
+
+            self.assertFalse(SheetsUploader().update_sheet({"Orgão": "PREFEITURA MUNICIPAL DE TESTE"}))
+
+        self.assertEqual(len(stub.requests), 4)
+        self.assertEqual(SHEETS_STATS.snapshot()['falhas'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
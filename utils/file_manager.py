@@ -20,18 +20,23 @@ class FileManager:
                 pdf_files.append(os.path.join(self.settings.PDF_TO_PROCESS, file))
         return pdf_files
     
+    def _processed_candidates(self, filename, edital_number):
+        """Caminhos de destino em PDF_PROCESSED: nome original e depois com sufixo _1, _2, ..."""
+        # O número do edital vem como "12/2024": a barra viraria um subdiretório inexistente
+        new_filename = f"{edital_number.replace('/', '-')}_{filename}" if edital_number else filename
+        yield os.path.join(self.settings.PDF_PROCESSED, new_filename)
+        
+        counter = 1
+        name_parts = new_filename.rsplit('.', 1)
+        while True:
+            yield os.path.join(self.settings.PDF_PROCESSED, f"{name_parts[0]}_{counter}.{name_parts[-1]}")
+            counter += 1
+    
     def move_to_processed(self, pdf_path, edital_number):
         try:
-            filename = os.path.basename(pdf_path)
-            new_filename = f"{edital_number}_{filename}" if edital_number else filename
-            dest_path = os.path.join(self.settings.PDF_PROCESSED, new_filename)
-            
-            counter = 1
-            while os.path.exists(dest_path):
-                name_parts = new_filename.rsplit('.', 1)
-                new_filename = f"{name_parts[0]}_{counter}.{name_parts[1]}"
-                dest_path = os.path.join(self.settings.PDF_PROCESSED, new_filename)
-                counter += 1
+            for dest_path in self._processed_candidates(os.path.basename(pdf_path), edital_number):
+                if not os.path.exists(dest_path):
+                    break
             
             shutil.move(pdf_path, dest_path)
             print(f"📦 Arquivo movido para: {dest_path}")
@@ -40,6 +45,28 @@ class FileManager:
             print(f"❌ Erro ao mover arquivo: {str(e)}")
             return False
     
+    def save_processed(self, pdf_path, filename, edital_number):
+        """Move para PDF_PROCESSED, com o nome original `filename`, um PDF enviado pela interface (spool de uploads)
+        
+        Nunca sobrescreve outro arquivo; no mesmo sistema de arquivos é só uma renomeação.
+        """
+        try:
+            filename = os.path.basename(filename)
+            for dest_path in self._processed_candidates(filename, edital_number):
+                try:
+                    # 'x' reserva o nome: dois workers com o mesmo nome nunca gravam o mesmo arquivo
+                    open(dest_path, 'xb').close()
+                    break
+                except FileExistsError:
+                    continue
+            
+            shutil.move(pdf_path, dest_path)
+            print(f"📦 Arquivo salvo em: {dest_path}")
+            return dest_path
+        except Exception as e:
+            print(f"❌ Erro ao salvar arquivo: {str(e)}")
+            return None
+    
     def organize_files(self):
         for file in os.listdir('.'):
             if file.lower().endswith('.pdf') and file != 'credentials.json':
@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+import logging
+
+logger = logging.getLogger(__name__)
+
+class InotifyWatcher:
+    """Eventos de uma pasta via inotify (Linux), sem dependências externas"""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    REMOVED_MASK = IN_MOVED_FROM | IN_DELETE
+
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify disponível apenas no Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 falhou")
+
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch falhou para {directory}")
+
+    def read_events(self, timeout):
+        """Aguarda até `timeout` segundos e retorna [(nome, máscara)]"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + self._EVENT.size <= len(buffer):
+            _, mask, _, name_len = self._EVENT.unpack_from(buffer, offset)
+            offset += self._EVENT.size
+            name = buffer[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            events.append((os.fsdecode(name), mask))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FolderWatcher:
+    """Detecta PDFs novos em uma pasta (inotify com fallback de polling) e só os libera com tamanho estável"""
+
+    def __init__(self, directory, poll_interval=10, settle_seconds=2):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self._candidates = {}  # caminho -> (tamanho observado, desde quando)
+        self._dispatched = {}  # caminho -> mtime entregue ao processamento
+        self._last_poll = 0.0
+
+        try:
+            self._inotify = InotifyWatcher(directory)
+            self.mode = "inotify"
+        except (OSError, AttributeError) as e:
+            logger.info(f"inotify indisponível ({str(e)}); usando polling a cada {poll_interval}s")
+            self._inotify = None
+            self.mode = "polling"
+
+        # Arquivos que já estavam na pasta entram como candidatos
+        self._poll()
+
+    @staticmethod
+    def _is_pdf(name):
+        return name.lower().endswith(".pdf")
+
+    def _add_candidate(self, path):
+        if path not in self._candidates:
+            self._candidates[path] = (None, time.monotonic())
+
+    def forget(self, path):
+        """Remove todo o estado de um arquivo (movido, apagado ou já processado)"""
+        self._candidates.pop(path, None)
+        self._dispatched.pop(path, None)
+
+    def _poll(self):
+        """Varredura completa da pasta: fallback sem inotify e ressincronização após overflow"""
+        self._last_poll = time.monotonic()
+        try:
+            names = [name for name in os.listdir(self.directory) if self._is_pdf(name)]
+        except FileNotFoundError:
+            names = []
+
+        present = {os.path.join(self.directory, name) for name in names}
+        for path in list(self._dispatched) + list(self._candidates):
+            if path not in present:
+                self.forget(path)
+
+        for path in present:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+            if self._dispatched.get(path) != mtime:
+                self._add_candidate(path)
+
+    def _handle_events(self, timeout):
+        for name, mask in self._inotify.read_events(timeout):
+            if mask & InotifyWatcher.IN_Q_OVERFLOW:
+                self._poll()
+                continue
+            if not self._is_pdf(name):
+                continue
+
+            path = os.path.join(self.directory, name)
+            if mask & InotifyWatcher.REMOVED_MASK:
+                self.forget(path)
+            else:
+                self._add_candidate(path)
+
+    def _settled(self):
+        """Candidatos cujo tamanho não mudou durante settle_seconds"""
+        ready = []
+        now = time.monotonic()
+        for path, (last_size, since) in list(self._candidates.items()):
+            try:
+                size = os.path.getsize(path)
+                mtime = os.path.getmtime(path)
+            except OSError:
+                self.forget(path)
+                continue
+
+            if size != last_size:
+                self._candidates[path] = (size, now)
+            elif size > 0 and now - since >= self.settle_seconds:
+                del self._candidates[path]
+                if self._dispatched.get(path) != mtime:
+                    self._dispatched[path] = mtime
+                    ready.append(path)
+        return sorted(ready)
+
+    def wait_ready(self, timeout=1.0):
+        """Aguarda eventos por até `timeout` segundos e retorna os PDFs prontos para processar"""
+        if self._inotify:
+            # Com candidatos pendentes, acorda a tempo de conferir se o tamanho estabilizou
+            wait = min(timeout, self.settle_seconds) if self._candidates else timeout
+            self._handle_events(wait)
+        else:
+            if time.monotonic() - self._last_poll >= self.poll_interval:
+                self._poll()
+            time.sleep(min(timeout, self.settle_seconds) if self._candidates else timeout)
+
+        return self._settled()
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import threading
+import logging
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+# Limites (s) do histograma de duração das etapas: de regex (ms) a OCR de documento longo (min)
+SPAN_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Descrição de cada contador no formato de texto do Prometheus
+COUNTER_HELP = {
+    "documentos": "Documentos processados",
+    "paginas_lidas": "Páginas lidas pelo pdfplumber",
+    "paginas_ocr": "Páginas enviadas ao OCR",
+    "padroes_testados": "Padrões regex testados na extração de campos",
+    "campos_nao_encontrados": "Campos sem valor após todos os fallbacks",
+    "padrao_execucoes": "Execuções de cada padrão regex",
+    "padrao_segundos": "Tempo acumulado de cada padrão regex",
+    "padroes_abortados": "Padrões regex abortados por estourar PATTERN_TIMEOUT",
+    "padroes_sem_limite": "Execuções de padrões regex sem PATTERN_TIMEOUT (módulo regex ausente fora da thread principal)",
+    "sheets_requisicoes": "Requisições à API do Google Sheets",
+    "sheets_retentativas": "Retentativas de requisições ao Google Sheets",
+    "sheets_falhas": "Requisições ao Google Sheets que falharam de vez",
+    "cache_configuracoes": "Leituras do cache de configurações por usuário (acerto ou falha do TTL)",
+}
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels) + "}"
+
+
+class Metrics:
+    """Spans por documento/etapa e contadores do pipeline, exportados em JSON lines e no formato do Prometheus"""
+
+    def __init__(self, trace_path=None):
+        self.trace_path = Settings().TRACE_LOG_PATH if trace_path is None else trace_path
+        self._lock = threading.Lock()
+        self._counters = {}  # (nome, rótulos) -> valor
+        self._spans = {}  # etapa -> [contagem, soma, contagem por bucket]
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            entry = self._spans.get(stage)
+            if entry is None:
+                entry = self._spans[stage] = [0, 0.0, [0] * len(SPAN_BUCKETS)]
+            entry[0] += 1
+            entry[1] += seconds
+            for i, bound in enumerate(SPAN_BUCKETS):
+                if seconds <= bound:
+                    entry[2][i] += 1
+
+    @contextmanager
+    def span(self, stage, document=None, **attributes):
+        """Mede um trecho do pipeline; a duração vai para o histograma e, se configurado, para o log de trace"""
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(stage, elapsed)
+            if self.trace_path:
+                self._write_trace({
+                    "ts": round(time.time(), 3),
+                    "documento": document,
+                    "etapa": stage,
+                    "duracao_s": round(elapsed, 6),
+                    "pid": os.getpid(),
+                    "thread": threading.current_thread().name,
+                    **attributes,
+                    **({"erro": error} if error else {}),
+                })
+
+    def _write_trace(self, record):
+        # Uma linha por span; escritas curtas em modo append não se misturam entre processos do pool
+        try:
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error(f"Erro ao gravar trace: {str(e)}")
+
+    def counter(self, name):
+        """Valores de um contador por conjunto de rótulos: {(("rótulo", "valor"), ...): valor}"""
+        with self._lock:
+            return {labels: value for (counter_name, labels), value in self._counters.items() if counter_name == name}
+
+    def drain(self):
+        """Retorna e zera os valores acumulados (processos do pool devolvem as métricas junto com o resultado)"""
+        with self._lock:
+            snapshot = {
+                "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+                "spans": {stage: [count, total, list(buckets)] for stage, (count, total, buckets) in self._spans.items()},
+            }
+            self._counters = {}
+            self._spans = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Soma os valores de um `drain()` (de outro processo ou do próprio)"""
+        if not snapshot:
+            return
+        with self._lock:
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                self._counters[key] = self._counters.get(key, 0) + value
+            for stage, (count, total, buckets) in snapshot["spans"].items():
+                entry = self._spans.get(stage)
+                if entry is None:
+                    entry = self._spans[stage] = [0, 0.0, [0] * len(SPAN_BUCKETS)]
+                entry[0] += count
+                entry[1] += total
+                entry[2] = [a + b for a, b in zip(entry[2], buckets)]
+
+    def render_prometheus(self):
+        """Métricas no formato de texto do Prometheus (exposition format 0.0.4)"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            spans = sorted((stage, list(entry[:2]) + [list(entry[2])]) for stage, entry in self._spans.items())
+
+        lines = []
+        current = None
+        for (name, labels), value in counters:
+            metric = f"edital_{name}_total"
+            if name != current:
+                lines.append(f"# HELP {metric} {COUNTER_HELP.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+                current = name
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        if spans:
+            lines.append("# HELP edital_etapa_segundos Duração das etapas do pipeline por documento")
+            lines.append("# TYPE edital_etapa_segundos histogram")
+        for stage, (count, total, buckets) in spans:
+            for bound, bucket_count in zip(SPAN_BUCKETS, buckets):
+                lines.append(f'edital_etapa_segundos_bucket{{etapa="{stage}",le="{bound}"}} {bucket_count}')
+            lines.append(f'edital_etapa_segundos_bucket{{etapa="{stage}",le="+Inf"}} {count}')
+            lines.append(f'edital_etapa_segundos_sum{{etapa="{stage}"}} {total:.6f}')
+            lines.append(f'edital_etapa_segundos_count{{etapa="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Grava as métricas em arquivo (para o textfile collector do node_exporter); troca atômica"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, path)
+
+
+def pattern_costs(metrics=None, top=10):
+    """Padrões regex com maior tempo acumulado: [(padrão, execuções, segundos, abortos)]"""
+    metrics = metrics or METRICS
+    seconds = {dict(labels)["padrao"]: value for labels, value in metrics.counter("padrao_segundos").items()}
+    runs = {dict(labels)["padrao"]: value for labels, value in metrics.counter("padrao_execucoes").items()}
+    aborted = {dict(labels)["padrao"]: value for labels, value in metrics.counter("padroes_abortados").items()}
+    ranked = sorted(seconds.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [(name, runs.get(name, 0), total, aborted.get(name, 0)) for name, total in ranked]
+
+
+METRICS = Metrics()
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=None):
+    """Expõe /metrics em HTTP (uma vez por processo); METRICS_PORT=0 desativa"""
+    global _server
+    port = Settings().METRICS_PORT if port is None else port
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = METRICS.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        try:
+            _server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        except OSError as e:
+            logger.error(f"Erro ao iniciar o endpoint de métricas na porta {port}: {str(e)}")
+            return None
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+        logger.info(f"📈 Métricas em http://127.0.0.1:{port}/metrics")
+        return _server
+
+def export_metrics(path=None):
+    """Grava as métricas em METRICS_FILE, se configurado"""
+    path = Settings().METRICS_FILE if path is None else path
+    if not path:
+        return
+    try:
+        METRICS.write_prometheus(path)
+    except OSError as e:
+        logger.error(f"Erro ao gravar métricas em {path}: {str(e)}")
@@ -1,56 +1,161 @@
 import os
-import pytesseract
-from pdf2image import convert_from_path
-from PIL import Image
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from config.settings import Settings
+from utils.metrics import METRICS
+
+# Memória aproximada por página em voo (imagem A4 a 300 dpi + processo do tesseract)
+PAGE_MEMORY_MB = 150
+
+class OCRPool:
+    """Pool de OCR por página: mantém N processos do tesseract ocupados e é reutilizável entre documentos
+    
+    OCR_WORKERS, as CPUs e OCR_MEMORY_BUDGET_MB são limites da máquina: com `processes` processos
+    de extração rodando OCR ao mesmo tempo, cada um fica com a sua fração.
+    """
+    
+    def __init__(self, workers=None, memory_budget_mb=None, processes=1):
+        settings = Settings()
+        processes = max(1, processes)
+        cpu_count = os.cpu_count() or 1
+        workers = (workers or settings.OCR_WORKERS or cpu_count) // processes
+        memory_budget_mb = (memory_budget_mb or settings.OCR_MEMORY_BUDGET_MB) // processes
+        self.workers = max(1, min(workers, cpu_count // processes, memory_budget_mb // PAGE_MEMORY_MB))
+        
+        if self.workers > 1 or processes > 1:
+            # Cada tesseract usa uma única thread; o paralelismo vem do pool
+            os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+    
+    @staticmethod
+    def _ocr_page(pdf_source, page_number):
+        """Rasteriza e faz OCR de uma única página (a imagem só existe enquanto a página está em voo)"""
+        # pdf2image, PIL e pytesseract só são carregados quando alguma página vai para o OCR
+        import pytesseract
+        from pdf2image import convert_from_path
+        
+        start = time.perf_counter()
+        images = convert_from_path(
+            pdf_source,
+            dpi=300,
+            first_page=page_number,
+            last_page=page_number
+        )
+        if not images:
+            return "", time.perf_counter() - start
+        
+        # Pré-processamento da imagem
+        image = images[0].convert('L')  # Converte para escala de cinza
+        image = image.point(lambda x: 0 if x < 140 else 255, '1')  # Binarização
+        
+        # Extração do texto
+        text = pytesseract.image_to_string(
+            image,
+            lang='por',
+            config='--psm 6 --oem 1'
+        )
+        return text, time.perf_counter() - start
+    
+    def process_pages(self, pdf_source, page_numbers):
+        """Faz OCR das páginas em paralelo a partir do caminho do PDF
+        
+        Retorna {página: texto} das páginas processadas, o tempo de cada uma e os erros por página:
+        uma página com erro não descarta o texto das demais.
+        """
+        futures = [self._executor.submit(self._ocr_page, pdf_source, page_number) for page_number in page_numbers]
+        texts = {}
+        timings = []
+        errors = []
+        for page_number, future in zip(page_numbers, futures):
+            try:
+                text, elapsed = future.result()
+            except Exception as e:
+                errors.append((page_number, e))
+                continue
+            texts[page_number] = text
+            timings.append((page_number, elapsed))
+        return texts, timings, errors
+    
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
 
 class OCRHandler:
+    _pool = None
+    _pool_lock = threading.Lock()
+    _processes = 1
+    
+    @classmethod
+    def set_process_share(cls, processes):
+        """Número de processos de extração que fazem OCR ao mesmo tempo (chamado em cada processo do pool)"""
+        with cls._pool_lock:
+            cls._processes = max(1, processes)
+            cls._pool = None
+    
+    @classmethod
+    def get_pool(cls):
+        """Pool de OCR do processo, dimensionado para a sua fração de CPU e memória"""
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = OCRPool(processes=cls._processes)
+            return cls._pool
+    
     @staticmethod
     def setup_tesseract():
         settings = Settings()
         
         if os.name == 'nt':  # Windows
+            import pytesseract
             pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_PATH
         elif os.name == 'posix':  # Linux/Mac
             # Tesseract geralmente está no caminho padrão
             pass
     
     @staticmethod
-    def process_pdf(pdf_path, max_pages=3):
-        """Processa PDF com OCR e retorna texto"""
+    def page_count(pdf_source):
+        """Número de páginas do PDF (via poppler), a partir do caminho do arquivo"""
+        try:
+            from pdf2image import pdfinfo_from_path
+            return pdfinfo_from_path(pdf_source)["Pages"]
+        except Exception as e:
+            print(f"❌ Erro ao contar páginas para OCR: {str(e)}")
+            return 0
+    
+    @staticmethod
+    def process_pages(pdf_source, page_numbers):
+        """Processa com OCR apenas as páginas indicadas (caminho do PDF) e retorna {página: texto}"""
+        if not page_numbers:
+            return {}
+        
         try:
             OCRHandler.setup_tesseract()
             
-            print("🔍 Processando PDF com OCR (pode demorar alguns segundos)...")
+            print(f"🔍 Processando {len(page_numbers)} página(s) com OCR (pode demorar alguns segundos)...")
             
-            images = convert_from_path(
-                pdf_path,
-                dpi=300,
-                first_page=1,
-                last_page=max_pages,
-                thread_count=2
-            )
+            pool = OCRHandler.get_pool()
+            METRICS.increment("paginas_ocr", len(page_numbers))
+            texts, timings, errors = pool.process_pages(pdf_source, page_numbers)
             
-            full_text = ""
-            for i, image in enumerate(images):
-                print(f"  📄 Processando página {i+1}/{min(max_pages, len(images))} com OCR...")
-                
-                # Pré-processamento da imagem
-                image = image.convert('L')  # Converte para escala de cinza
-                image = image.point(lambda x: 0 if x < 140 else 255, '1')  # Binarização
-                
-                # Extração do texto
-                text = pytesseract.image_to_string(
-                    image,
-                    lang='por',
-                    config='--psm 6 --oem 1'
-                )
-                full_text += text + "\n"
+            for page_number, elapsed in timings:
+                print(f"  📄 Página {page_number} com OCR: {elapsed:.2f}s")
+            for page_number, error in errors:
+                print(f"❌ Erro no OCR da página {page_number}: {str(error)}")
             
-            print("✅ OCR concluído com sucesso!")
-            return full_text
+            if errors and not texts:
+                print("💡 Dica: Instale o Tesseract OCR e poppler para PDFs escaneados")
+            elif texts:
+                print("✅ OCR concluído com sucesso!")
+            return texts
             
         except Exception as e:
             print(f"❌ Erro no processamento OCR: {str(e)}")
             print("💡 Dica: Instale o Tesseract OCR e poppler para PDFs escaneados")
-            return ""
\ No newline at end of file
+            return {}
+    
+    @staticmethod
+    def process_pdf(pdf_path, max_pages=3):
+        """Processa PDF com OCR e retorna texto"""
+        page_numbers = list(range(1, min(max_pages, OCRHandler.page_count(pdf_path)) + 1))
+        page_texts = OCRHandler.process_pages(pdf_path, page_numbers)
+        return "".join(page_texts[page_number] + "\n" for page_number in page_numbers if page_number in page_texts)
\ No newline at end of file
@@ -0,0 +1,153 @@
+import os
+import re
+import sys
+import time
+import marshal
+import pstats
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from config.settings import Settings
+
+# Arquivos cujas funções entram no resumo, agrupadas pela parte do pipeline a que pertencem
+PROFILE_GROUPS = {
+    os.path.join("core", "pdf_processor.py"): "PDFProcessor",
+    os.path.join("config", "patterns.py"): "ExtractionPatterns",
+    os.path.join("utils", "ocr_handler.py"): "OCRHandler",
+}
+
+class StackSampler:
+    """Amostrador de pilha por tempo de parede: a cada `interval` s registra a pilha de uma thread
+
+    Diferente do cProfile, conta também o tempo parado em I/O (poppler, tesseract, rede) e quase
+    não desacelera o código medido. O resultado é gravado no formato do pstats.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples = 0
+        self._leaf = Counter()
+        self._inclusive = Counter()
+        self._callers = Counter()  # (função, chamadora) -> amostras
+        self._stop = threading.Event()
+        self._thread = None
+        self._elapsed = 0.0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._elapsed = time.perf_counter() - self._started
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+
+            self.samples += 1
+            self._leaf[stack[0]] += 1
+            # Recursão: a função conta uma vez por amostra no tempo acumulado
+            self._inclusive.update(set(stack))
+            self._callers.update(set(zip(stack, stack[1:])))
+
+    def stats(self):
+        """Amostras convertidas para o dicionário do pstats: {função: (cc, nc, tt, ct, chamadoras)}"""
+        seconds = self._elapsed / self.samples if self.samples else self.interval
+        callers = {}
+        for (function, caller), count in self._callers.items():
+            callers.setdefault(function, {})[caller] = (count, count, count * seconds, count * seconds)
+
+        return {
+            function: (count, count, self._leaf[function] * seconds, count * seconds, callers.get(function, {}))
+            for function, count in self._inclusive.items()
+        }
+
+    def dump_stats(self, path):
+        with open(path, "wb") as f:
+            marshal.dump(self.stats(), f)
+
+
+def _profile_group(filename):
+    for suffix, group in PROFILE_GROUPS.items():
+        if filename.endswith(suffix):
+            return group
+    return None
+
+def summarize_profile(stats_path, top=25):
+    """Resumo das N funções do projeto com maior tempo acumulado e o tempo próprio por grupo"""
+    stats = pstats.Stats(stats_path).stats
+    rows = []
+    totals = Counter()
+    for (filename, line, function), (_, calls, own_time, cumulative, _) in stats.items():
+        group = _profile_group(filename)
+        if group:
+            rows.append((cumulative, own_time, calls, group, f"{os.path.basename(filename)}:{line}({function})"))
+            totals[group] += own_time
+    rows.sort(reverse=True)
+
+    lines = [f"{'acumulado (s)':>13} {'próprio (s)':>11} {'chamadas':>9}  {'grupo':<18} função"]
+    for cumulative, own_time, calls, group, name in rows[:top]:
+        lines.append(f"{cumulative:>13.3f} {own_time:>11.3f} {calls:>9}  {group:<18} {name}")
+    lines.append("")
+    lines.append("Tempo próprio por grupo: " + ", ".join(f"{group} {seconds:.3f}s" for group, seconds in totals.most_common()))
+    return "\n".join(lines)
+
+def profile_name(edital_number, filename):
+    """Nome estável do perfil (sem data): o mesmo edital gera o mesmo arquivo em versões diferentes"""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return re.sub(r"[^\w.-]+", "_", f"{edital_number}__{stem}").strip("_")
+
+@contextmanager
+def _profiled(mode, edital_number, filename):
+    settings = Settings()
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    base_path = os.path.join(settings.PROFILE_DIR, f"{profile_name(edital_number, filename)}.{mode}")
+
+    if mode == "sampler":
+        profiler = StackSampler(settings.PROFILE_SAMPLE_INTERVAL)
+        profiler.start()
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Python 3.12+: só um cProfile ativo por vez no processo (ex.: dois workers do upload)
+            print(f"⚠️ Perfil não gerado para {os.path.basename(filename)}: {str(e)}")
+            yield
+            return
+    try:
+        yield
+    finally:
+        if mode == "sampler":
+            profiler.stop()
+        else:
+            profiler.disable()
+        profiler.dump_stats(f"{base_path}.pstats")
+
+        summary = summarize_profile(f"{base_path}.pstats", settings.PROFILE_TOP)
+        with open(f"{base_path}.txt", "w", encoding="utf-8") as f:
+            f.write(summary + "\n")
+        print(f"\n🔬 Perfil ({mode}) de {os.path.basename(filename)}: {base_path}.pstats")
+        print(summary)
+
+def profile_document(edital_number, filename):
+    """Envolve o processamento de um documento em cProfile ou no amostrador, conforme PROFILE_MODE
+
+    Com PROFILE_MODE vazio devolve um contexto nulo: nada é medido nem gravado.
+    """
+    mode = Settings.PROFILE_MODE
+    if not mode:
+        return nullcontext()
+    return _profiled("sampler" if mode == "sampler" else "cprofile", edital_number, filename)
@@ -0,0 +1,162 @@
+import time
+import random
+import socket
+import threading
+import logging
+from config.settings import Settings
+from utils.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Respostas da API do Sheets que valem uma nova tentativa (cota excedida e falhas do servidor)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Limitador token bucket que não passa de `rate_per_minute` requisições em nenhuma janela de 60 s
+
+    Até `burst` requisições saem na hora; os tokens são repostos a (rate_per_minute - burst) por
+    minuto, de modo que a rajada somada à reposição de um minuto cabe na cota.
+    """
+
+    def __init__(self, rate_per_minute, burst=None):
+        burst = Settings().SHEETS_BURST if burst is None else burst
+        self.capacity = max(1, min(burst, int(rate_per_minute) - 1))
+        self.rate = max(rate_per_minute - self.capacity, 1) / 60.0
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Consome um token, esperando se necessário; retorna quantos segundos esperou"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1 - 1e-9:  # tolera o arredondamento da reposição
+                    self._tokens = max(self._tokens - 1, 0.0)
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def penalize(self):
+        """Após um 429 zera os tokens: as próximas requisições do usuário também desaceleram"""
+        with self._lock:
+            self._tokens = 0.0
+            self._updated = time.monotonic()
+
+
+class SheetsRetryStats:
+    """Contadores do envio para o Sheets, somados por todos os uploaders do processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.retries = 0
+            self.failures = 0
+            self.throttle_waits = 0
+            self.throttle_seconds = 0.0
+            self.backoff_seconds = 0.0
+            self.status_counts = {}
+
+    def add(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def count_status(self, status):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requisicoes': self.requests,
+                'retentativas': self.retries,
+                'falhas': self.failures,
+                'esperas_limite': self.throttle_waits,
+                'espera_limite_s': round(self.throttle_seconds, 3),
+                'espera_backoff_s': round(self.backoff_seconds, 3),
+                'status': dict(self.status_counts),
+            }
+
+
+SHEETS_STATS = SheetsRetryStats()
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_limiter(key):
+    """Limitador compartilhado por todas as threads/uploaders do processo para um mesmo usuário"""
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = TokenBucket(Settings().SHEETS_REQUESTS_PER_MINUTE)
+        return _limiters[key]
+
+def _http_status(error):
+    """Status HTTP de um HttpError do googleapiclient (None para outros erros)
+
+    O googleapiclient só é importado aqui, quando uma requisição já falhou.
+    """
+    from googleapiclient.errors import HttpError
+    return error.resp.status if isinstance(error, HttpError) else None
+
+def _retry_delay(error, attempt, base, maximum):
+    """Backoff exponencial com jitter completo; respeita o Retry-After quando a API informa"""
+    retry_after = None
+    if _http_status(error) is not None:
+        retry_after = error.resp.get('retry-after')
+    if retry_after and str(retry_after).isdigit():
+        return min(float(retry_after), maximum)
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+def _is_retryable(error):
+    status = _http_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, (socket.timeout, ConnectionError, TimeoutError))
+
+def execute_with_retry(request, limiter=None, retries=None, stats=SHEETS_STATS, base_delay=None, max_delay=None):
+    """Executa uma requisição da API do Google passando pelo limitador e repetindo falhas transitórias
+
+    São feitas até 1 + `retries` tentativas (por padrão Settings.RETRY_ATTEMPTS).
+    """
+    settings = Settings()
+    retries = settings.RETRY_ATTEMPTS if retries is None else retries
+    base_delay = settings.SHEETS_BACKOFF_BASE if base_delay is None else base_delay
+    max_delay = settings.SHEETS_BACKOFF_MAX if max_delay is None else max_delay
+
+    attempt = 0
+    while True:
+        if limiter:
+            waited = limiter.acquire()
+            if waited:
+                stats.add(throttle_waits=1, throttle_seconds=waited)
+
+        stats.add(requests=1)
+        METRICS.increment("sheets_requisicoes")
+        try:
+            return request.execute()
+        except Exception as e:
+            status = _http_status(e)
+            if status is not None:
+                stats.count_status(status)
+            if not _is_retryable(e) or attempt >= retries:
+                stats.add(failures=1)
+                METRICS.increment("sheets_falhas", status=status or type(e).__name__)
+                raise
+
+            if limiter and status == 429:
+                limiter.penalize()
+            delay = _retry_delay(e, attempt, base_delay, max_delay)
+            attempt += 1
+            stats.add(retries=1, backoff_seconds=delay)
+            METRICS.increment("sheets_retentativas", status=status or type(e).__name__)
+            reason = f"HTTP {status}" if status is not None else type(e).__name__
+            logger.warning(f"⚠️ Sheets respondeu {reason}: nova tentativa {attempt}/{retries} em {delay:.1f}s")
+            time.sleep(delay)